@@ -0,0 +1,3 @@
+"""Overworld: simulació procedural d'un món amb sistemes emergents."""
+
+__version__ = "0.1.0"
@@ -0,0 +1,5 @@
+"""Integració amb Ollama per a decisions de civilitzacions."""
+
+from overworld.ai.ollama_client import OllamaClient, get_ollama_client
+
+__all__ = ["OllamaClient", "get_ollama_client"]
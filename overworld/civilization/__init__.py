@@ -0,0 +1 @@
+"""Sistemes de civilització: demografia, diplomàcia, llengües, guerra."""
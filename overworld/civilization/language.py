@@ -0,0 +1,439 @@
+"""Generació procedural de llengües per a civilitzacions.
+
+Cada llengua té un inventari de fonemes, regles fonològiques i un
+vocabulari bàsic; les famílies lingüístiques deriven llengües filles amb
+canvis de so acumulats.
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    numba = None
+    HAS_NUMBA = False
+
+
+@dataclass(slots=True, frozen=True)
+class PhonemeInventory:
+    """Inventari de fonemes d'una llengua (immutable un cop generat).
+
+    Els conjunts i la llista d'oclusives es precalculen aquí una sola
+    vegada: els bucles d'adaptació i similitud fan tests de pertinença
+    constantment i no han de reconstruir sets per crida.
+    """
+    consonants: Tuple[str, ...]
+    vowels: Tuple[str, ...]
+    consonant_set: frozenset = field(init=False, repr=False, compare=False)
+    vowel_set: frozenset = field(init=False, repr=False, compare=False)
+    stops_available: Tuple[str, ...] = field(init=False, repr=False,
+                                             compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "consonant_set", frozenset(self.consonants))
+        object.__setattr__(self, "vowel_set", frozenset(self.vowels))
+        object.__setattr__(self, "stops_available",
+                           tuple(c for c in self.consonants
+                                 if c in ("p", "b", "t", "d", "k", "g")))
+
+
+@dataclass(slots=True, frozen=True)
+class PhonologyRules:
+    """Regles fonològiques: estructures sil·làbiques permeses."""
+    syllable_structures: Tuple[str, ...]
+    max_syllables: int = 3
+
+
+class Vocabulary(dict):
+    """Dict concepte→paraula amb la llista de claus en caché.
+
+    Els bucles de manlleu i evolució necessiten la llista de claus a
+    cada tick; materialitzar-la només quan el vocabulari ha canviat
+    estalvia re-llistar milers de cadenes per crida.
+    """
+
+    __slots__ = ("_keys_cache",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._keys_cache: Optional[List[str]] = None
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._keys_cache = None
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._keys_cache = None
+        super().__delitem__(key)
+
+    def update(self, *args, **kwargs):
+        self._keys_cache = None
+        super().update(*args, **kwargs)
+
+    def pop(self, *args):
+        self._keys_cache = None
+        return super().pop(*args)
+
+    def clear(self):
+        self._keys_cache = None
+        super().clear()
+
+    def keys_list(self) -> List[str]:
+        """Llista de claus, reutilitzada fins a la següent mutació."""
+        if self._keys_cache is None:
+            self._keys_cache = list(self)
+        return self._keys_cache
+
+
+@dataclass(slots=True)
+class Language:
+    """Una llengua amb inventari, fonologia i vocabulari."""
+    name: str
+    phoneme_inventory: PhonemeInventory
+    phonology_rules: PhonologyRules
+    vocabulary: Dict[str, str] = field(default_factory=Vocabulary)
+    parent_name: Optional[str] = None
+    # Generador de paraules especialitzat per a aquesta llengua (codegen).
+    _word_fn: Optional[object] = field(default=None, repr=False,
+                                       compare=False)
+
+
+# Canvis de so precompilats: abans es reconstruïen tres closures (i la
+# llista de vocals) a cada crida de _apply_sound_change.
+_FINAL_VOWELS = ("a", "i", "u")
+
+
+def _drop_first(word: str) -> str:
+    return word[1:] if len(word) > 1 else word
+
+
+def _drop_last(word: str) -> str:
+    return word[:-1] if len(word) > 1 else word
+
+
+def _append_vowel(word: str) -> str:
+    return word + random.choice(_FINAL_VOWELS)
+
+
+_SOUND_CHANGES = (_drop_first, _drop_last, _append_vowel)
+
+
+if HAS_NUMBA:
+    @numba.njit(cache=True)
+    def _sample_word_indices(syllable_counts, structure_idx, structs,
+                             struct_lens, n_cons, n_vowels):
+        """Nucli compilat: índexs de fonema de tot un lot de paraules.
+
+        `structs` és la taula (n_estructures, long_màx) amb 1=C, 2=V i 0
+        de farciment; retorna els tipus de casella, els índexs mostrejats
+        i els desplaçaments de cada paraula.
+        """
+        n_words = syllable_counts.shape[0]
+        total = 0
+        si = 0
+        for i in range(n_words):
+            for _ in range(syllable_counts[i]):
+                total += struct_lens[structure_idx[si]]
+                si += 1
+        kinds = np.empty(total, np.int8)
+        sels = np.empty(total, np.int32)
+        offsets = np.empty(n_words + 1, np.int64)
+        pos = 0
+        si = 0
+        for i in range(n_words):
+            offsets[i] = pos
+            for _ in range(syllable_counts[i]):
+                s = structure_idx[si]
+                for j in range(struct_lens[s]):
+                    kind = structs[s, j]
+                    kinds[pos] = kind
+                    if kind == 1:
+                        sels[pos] = np.random.randint(0, n_cons)
+                    else:
+                        sels[pos] = np.random.randint(0, n_vowels)
+                    pos += 1
+                si += 1
+        offsets[n_words] = pos
+        return kinds, sels, offsets
+
+
+def make_word_generator(consonants, vowels, structures, max_syllables):
+    """Sintetitza un generador de paraules especialitzat per a una llengua.
+
+    L'inventari i les estructures són fixos durant la vida de la llengua,
+    així que es poden coure dins d'una closure generada amb `exec`: els
+    accessos a atributs es converteixen en lectures de variables locals i
+    el despatx d'estructures queda desenrotllat.
+    """
+    consonants = tuple(consonants)
+    vowels = tuple(vowels)
+    structures = tuple(structures)
+
+    lines = [
+        "def _word_fn(ri=_randrange, C=_C, V=_V, mx=_mx, nS=_nS):",
+        "    w = ''",
+        "    for _ in range(ri(mx) + 1):",
+        "        s = ri(nS)",
+    ]
+    for i, structure in enumerate(structures):
+        parts = " + ".join(
+            f"C[ri({len(consonants)})]" if slot == "C"
+            else f"V[ri({len(vowels)})]"
+            for slot in structure)
+        lines.append(f"        {'if' if i == 0 else 'elif'} s == {i}:")
+        lines.append(f"            w += {parts}")
+    lines.append("    return w")
+
+    namespace = {
+        "_randrange": random.randrange,
+        "_C": consonants,
+        "_V": vowels,
+        "_mx": max_syllables,
+        "_nS": len(structures),
+    }
+    exec("\n".join(lines), namespace)
+    return namespace["_word_fn"]
+
+
+class LanguageGenerator:
+    """Genera llengües noves amb mostreig vectoritzat de fonemes."""
+
+    CONSONANTS_POOL = {
+        "oclusives": ["p", "b", "t", "d", "k", "g"],
+        "fricatives": ["f", "v", "s", "z", "x", "h"],
+        "nasals": ["m", "n", "ny"],
+        "líquides": ["l", "r", "ll"],
+        "aproximants": ["w", "j"],
+    }
+
+    VOWELS_POOL = ["a", "e", "i", "o", "u", "è", "ò"]
+
+    SYLLABLE_STRUCTURES = ["CV", "CVC", "VC", "V", "CVV"]
+
+    # Aplanat una sola vegada: el bucle d'evolució el consultava a cada
+    # iteració.
+    ALL_CONSONANTS = tuple(c for group in CONSONANTS_POOL.values()
+                           for c in group)
+    ALL_CONSONANTS_SET = frozenset(ALL_CONSONANTS)
+
+    BASIC_CONCEPTS = [
+        "aigua", "foc", "terra", "cel", "sol", "lluna", "estrella", "mar",
+        "muntanya", "riu", "arbre", "pedra", "casa", "camí", "persona",
+        "mare", "pare", "fill", "mà", "ull", "cor", "sang", "menjar",
+        "beure", "dormir", "caminar", "parlar", "veure", "gran", "petit",
+        "bo", "dolent", "dia", "nit", "vida", "mort",
+    ]
+
+    def __init__(self, seed: Optional[int] = None):
+        self.rng = np.random.default_rng(seed)
+        # Estructures empaquetades per regles (hashables): només es
+        # codifiquen una vegada per fonologia per al nucli compilat.
+        self._packed_rules: Dict[PhonologyRules,
+                                 Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _pack_structures(
+            self, rules: PhonologyRules) -> Tuple[np.ndarray, np.ndarray]:
+        packed = self._packed_rules.get(rules)
+        if packed is None:
+            structures = rules.syllable_structures
+            max_len = max(len(s) for s in structures)
+            table = np.zeros((len(structures), max_len), np.int8)
+            lens = np.empty(len(structures), np.int8)
+            for i, structure in enumerate(structures):
+                lens[i] = len(structure)
+                for j, slot in enumerate(structure):
+                    table[i, j] = 1 if slot == "C" else 2
+            packed = self._packed_rules[rules] = (table, lens)
+        return packed
+
+    def generate_language(self, name: str) -> Language:
+        """Genera una llengua completa amb vocabulari bàsic."""
+        inventory = self._generate_phoneme_inventory()
+        rules = self._generate_phonology_rules()
+        language = Language(name, inventory, rules)
+        self._generate_vocabulary(language)
+        return language
+
+    def _generate_phoneme_inventory(self) -> PhonemeInventory:
+        consonants: List[str] = []
+        for group in self.CONSONANTS_POOL.values():
+            size = self.rng.integers(1, len(group) + 1)
+            chosen = self.rng.choice(len(group), size=size, replace=False)
+            consonants.extend(group[i] for i in chosen)
+        num_vowels = int(self.rng.integers(3, len(self.VOWELS_POOL) + 1))
+        chosen_vowels = self.rng.choice(len(self.VOWELS_POOL),
+                                        size=num_vowels, replace=False)
+        vowels = tuple(self.VOWELS_POOL[i] for i in chosen_vowels)
+        return PhonemeInventory(consonants=tuple(consonants), vowels=vowels)
+
+    def _generate_phonology_rules(self) -> PhonologyRules:
+        num_structures = int(self.rng.integers(2, 5))
+        chosen = self.rng.choice(len(self.SYLLABLE_STRUCTURES),
+                                 size=num_structures, replace=False)
+        structures = tuple(self.SYLLABLE_STRUCTURES[i] for i in chosen)
+        return PhonologyRules(syllable_structures=structures,
+                              max_syllables=int(self.rng.integers(2, 5)))
+
+    def _generate_vocabulary(self, language: Language) -> None:
+        words = self._generate_words_batch(language,
+                                           len(self.BASIC_CONCEPTS))
+        for concept, word in zip(self.BASIC_CONCEPTS, words):
+            language.vocabulary[concept] = word
+
+    def _generate_words_batch(self, language: Language,
+                              count: int) -> List[str]:
+        """Genera `count` paraules amb un sol pla de dibuixos RNG.
+
+        En lloc d'una crida `random.choice` per posició, es calcula el
+        pla de caràcters de totes les paraules (seqüència "CV...") i es
+        treuen tots els índexs de consonants i vocals en dues crides
+        vectoritzades.
+        """
+        consonants = language.phoneme_inventory.consonants
+        vowels = language.phoneme_inventory.vowels
+        structures = language.phonology_rules.syllable_structures
+        max_syllables = language.phonology_rules.max_syllables
+
+        syllable_counts = self.rng.integers(1, max_syllables + 1, size=count)
+        total_syllables = int(syllable_counts.sum())
+        structure_idx = self.rng.integers(0, len(structures),
+                                          size=total_syllables)
+
+        if HAS_NUMBA:
+            table, lens = self._pack_structures(language.phonology_rules)
+            kinds, sels, offsets = _sample_word_indices(
+                syllable_counts, structure_idx, table, lens,
+                len(consonants), len(vowels))
+            words = []
+            for i in range(count):
+                chars = [consonants[sels[j]] if kinds[j] == 1
+                         else vowels[sels[j]]
+                         for j in range(offsets[i], offsets[i + 1])]
+                words.append("".join(chars))
+            return words
+
+        # Pla de caràcters de tot el lot i recompte de C i V.
+        plan = "".join(structures[i] for i in structure_idx)
+        num_consonants = plan.count("C")
+        num_vowels = len(plan) - num_consonants
+        cons_idx = self.rng.integers(0, len(consonants), size=num_consonants)
+        vowel_idx = self.rng.integers(0, len(vowels), size=num_vowels)
+
+        words: List[str] = []
+        ci = vi = si = 0
+        for syllables in syllable_counts:
+            chars: List[str] = []
+            for _ in range(syllables):
+                for slot in structures[structure_idx[si]]:
+                    if slot == "C":
+                        chars.append(consonants[cons_idx[ci]])
+                        ci += 1
+                    else:
+                        chars.append(vowels[vowel_idx[vi]])
+                        vi += 1
+                si += 1
+            words.append("".join(chars))
+        return words
+
+    def _generate_word(self, language: Language) -> str:
+        """Genera una sola paraula amb la closure especialitzada."""
+        word_fn = language._word_fn
+        if word_fn is None:
+            word_fn = language._word_fn = make_word_generator(
+                language.phoneme_inventory.consonants,
+                language.phoneme_inventory.vowels,
+                language.phonology_rules.syllable_structures,
+                language.phonology_rules.max_syllables)
+        return word_fn()
+
+    def _generate_syllable(self, language: Language) -> str:
+        structure = random.choice(
+            language.phonology_rules.syllable_structures)
+        syllable = ""
+        for slot in structure:
+            if slot == "C":
+                syllable += random.choice(
+                    language.phoneme_inventory.consonants)
+            else:
+                syllable += random.choice(language.phoneme_inventory.vowels)
+        return syllable
+
+
+class LanguageFamily:
+    """Família de llengües derivades d'una llengua arrel."""
+
+    def __init__(self, root_language: Language,
+                 generator: Optional[LanguageGenerator] = None):
+        self.root_language = root_language
+        self.generator = generator or LanguageGenerator()
+        self.languages: Dict[str, Language] = {
+            root_language.name: root_language}
+
+    def generate_daughter_language(self, base_language: Language, name: str,
+                                   divergence: float = 0.3) -> Language:
+        """Deriva una llengua filla amb una divergència donada (0-1)."""
+        new_consonants = list(base_language.phoneme_inventory.consonants)
+        new_vowels = list(base_language.phoneme_inventory.vowels)
+
+        num_changes = max(1, int(len(new_consonants) * divergence))
+        cons_set = set(new_consonants)  # mirall per a pertinença O(1)
+        for _ in range(num_changes):
+            if random.random() < 0.5 and len(new_consonants) > 3:
+                # swap-and-pop O(1) en lloc de remove() amb escaneig lineal
+                i = random.randrange(len(new_consonants))
+                removed = new_consonants[i]
+                new_consonants[i] = new_consonants[-1]
+                new_consonants.pop()
+                cons_set.discard(removed)
+            else:
+                candidates = LanguageGenerator.ALL_CONSONANTS_SET - cons_set
+                if candidates:
+                    added = random.choice(tuple(candidates))
+                    new_consonants.append(added)
+                    cons_set.add(added)
+
+        inventory = PhonemeInventory(consonants=tuple(new_consonants),
+                                     vowels=tuple(new_vowels))
+        rules = PhonologyRules(
+            syllable_structures=base_language.phonology_rules
+            .syllable_structures,
+            max_syllables=base_language.phonology_rules.max_syllables)
+        daughter = Language(name, inventory, rules,
+                            parent_name=base_language.name)
+
+        # Totes les decisions RNG del vocabulari en dues crides
+        # vectoritzades; després cada cub es processa en bloc.
+        items = list(base_language.vocabulary.items())
+        rng = self.generator.rng
+        regen_mask = rng.random(len(items)) < divergence
+
+        regen_concepts = [concept for (concept, _), regen
+                          in zip(items, regen_mask) if regen]
+        for concept, word in zip(
+                regen_concepts,
+                self.generator._generate_words_batch(
+                    daughter, len(regen_concepts))):
+            daughter.vocabulary[concept] = word
+
+        mutate_items = [item for item, regen in zip(items, regen_mask)
+                        if not regen]
+        change_idx = rng.integers(0, len(_SOUND_CHANGES),
+                                  size=len(mutate_items))
+        for (concept, word), change in zip(mutate_items, change_idx):
+            daughter.vocabulary[concept] = \
+                _SOUND_CHANGES[change](word) if word else word
+
+        self.languages[name] = daughter
+        return daughter
+
+    def _apply_sound_change(self, word: str) -> str:
+        """Aplica un canvi de so aleatori a una paraula."""
+        if not word:
+            return word
+        return _SOUND_CHANGES[random.randrange(len(_SOUND_CHANGES))](word)
@@ -0,0 +1,671 @@
+"""Evolució lingüística: contacte entre llengües, manlleus i expansió
+contextual de vocabulari amb Ollama.
+
+Complementa `language.py`: aquí les llengües ja existeixen i el que es
+modela és com canvien amb el temps i el contacte entre civilitzacions.
+"""
+
+import asyncio
+import logging
+import random
+from collections import Counter
+from string import Template
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    numba = None
+    HAS_NUMBA = False
+
+from ..ai.ollama_client import OllamaClient, get_ollama_client
+from .language import Language, LanguageGenerator
+
+logger = logging.getLogger(__name__)
+
+# Trets culturals quantitzats a float16: la precisió final és ":.0f" al
+# prompt, així que mitja precisió sobra i la conversió a percentatge es
+# vectoritza per a tot el lot.
+CULTURE_DTYPE = np.dtype([("militarisme", "f2"), ("religiositat", "f2"),
+                          ("comerç", "f2")])
+
+# Plantilla del prompt per civilització: el bloc d'instruccions (llarg i
+# estàtic) va al COMENÇAMENT perquè el prefix compartit es reutilitzi a
+# la caché KV d'Ollama entre civilitzacions; només la cua és dinàmica.
+_PROMPT_TMPL = Template(
+    "Genera exactament 10 conceptes (noms comuns, en català, una sola "
+    "paraula cadascun) que serien importants per a la cultura de la "
+    "civilització descrita a continuació.\n"
+    "Respon només amb JSON: {\"conceptes\": [...]}\n"
+    "\n"
+    "Civilització: $civ\n"
+    "Entorn: $env\n"
+    "Trets culturals:\n"
+    "- Militarisme: $mil/100\n"
+    "- Religiositat: $rel/100\n"
+    "- Comerç: $com/100")
+
+_MULTI_CIV_LINE = ("{i}. {name} — entorn: {env}; militarisme {mil}/100, "
+                   "religiositat {rel}/100, comerç {com}/100")
+
+# Esquema de la resposta d'expansió de vocabulari: 10 conceptes nous.
+_CONCEPTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "conceptes": {
+            "type": "array",
+            "items": {"type": "string"},
+            "minItems": 10,
+            "maxItems": 10,
+        },
+    },
+    "required": ["conceptes"],
+}
+
+
+# Mida de les taules de consulta per punt de codi del nucli d'adaptació;
+# cobreix tot Latin-1 i els caràcters accentuats dels inventaris.
+_ADAPT_TABLE_SIZE = 1024
+
+# Oclusives: frozenset per als tests de pertinença en Python pur i taula
+# per punt de codi per al despatx sense branques del nucli compilat.
+_STOPS = frozenset("pbtdkg")
+_STOP_TABLE = bytes(1 if chr(i) in _STOPS else 0 for i in range(256))
+
+_STOP_MASK = np.zeros(_ADAPT_TABLE_SIZE, np.uint8)
+for _ch in _STOPS:
+    _STOP_MASK[ord(_ch)] = 1
+del _ch
+
+if HAS_NUMBA:
+    @numba.njit(cache=True)
+    def _popcount64(x):
+        """Popcount de 64 bits (bit-twiddling clàssic)."""
+        x = x - ((x >> 1) & 0x5555555555555555)
+        x = (x & 0x3333333333333333) + ((x >> 2) & 0x3333333333333333)
+        x = (x + (x >> 4)) & 0x0F0F0F0F0F0F0F0F
+        return (x * 0x0101010101010101) >> 56
+
+    @numba.njit(parallel=True, cache=True)
+    def _phonetic_sim_kernel(cmask, vmask, csize, vsize):
+        """Similitud fonètica de totes les parelles en paral·lel.
+
+        Cada inventari és un parell de màscares uint64 (un bit per
+        fonema): la intersecció és un AND + popcount i el triangle
+        superior es reparteix entre fils amb prange.
+        """
+        n = cmask.shape[0]
+        sim = np.zeros((n, n), np.float64)
+        for i in numba.prange(n):
+            for j in range(i + 1, n):
+                inter = (_popcount64(cmask[i] & cmask[j])
+                         + _popcount64(vmask[i] & vmask[j]))
+                union = csize[i] + csize[j] + vsize[i] + vsize[j] - inter
+                if union > 0:
+                    sim[i, j] = inter / union
+        return sim
+
+    @numba.njit(cache=True)
+    def _adapt_kernel(codes, known, stop_mask, stops, cons, vowels):
+        """Adapta una paraula (punts de codi) a l'inventari destí.
+
+        Bucle estret sobre enters amb taules de consulta: cap objecte
+        Python per caràcter.
+        """
+        out = np.empty_like(codes)
+        for i in range(codes.shape[0]):
+            c = codes[i]
+            if known[c]:
+                out[i] = c
+            elif stop_mask[c]:
+                if stops.shape[0] > 0:
+                    out[i] = stops[np.random.randint(0, stops.shape[0])]
+                else:
+                    out[i] = cons[np.random.randint(0, cons.shape[0])]
+            elif c == 97 or c == 101 or c == 105 or c == 111 or c == 117:
+                out[i] = vowels[np.random.randint(0, vowels.shape[0])]
+            else:
+                out[i] = cons[np.random.randint(0, cons.shape[0])]
+        return out
+
+
+# Canvis de so precompilats a escala de mòdul: abans es reconstruïen
+# quatre closures a cada crida. El segon argument és la vocal epentètica
+# (triada de l'inventari de la llengua, no d'una llista fixa) i només
+# l'usa l'opció 2.
+_SOUND_CHANGES = (
+    lambda w, v: w[1:] if len(w) > 2 else w,
+    lambda w, v: w[:-1] if len(w) > 2 else w,
+    lambda w, v: w + v,
+    lambda w, v: w[0] + w if len(w) > 1 else w,
+)
+
+
+@dataclass(slots=True, frozen=True)
+class LinguisticContact:
+    """Contacte lingüístic entre dues civilitzacions.
+
+    Els participants s'emmagatzemen com a ids interns (vegeu
+    LanguageEvolutionSystem.name_of): un enter per contacte en lloc de
+    duplicar les cadenes de nom a cada registre.
+    """
+    civ1_id: int
+    civ2_id: int
+    intensity: float  # 0.0 (esporàdic) .. 1.0 (convivència)
+    year_started: int
+    contact_type: str = "comerç"  # comerç, guerra, veïnatge
+
+
+@dataclass(slots=True, frozen=True)
+class Loanword:
+    """Paraula manllevada d'una altra llengua."""
+    concept: str
+    word: str
+    source_language: str
+    year_borrowed: int
+
+
+class AdvancedLanguageGenerator:
+    """Generador de llengües amb expansió contextual de vocabulari.
+
+    El vocabulari bàsic surt de `LanguageGenerator`; els conceptes
+    específics del context de cada civilització (entorn, trets culturals)
+    es demanen a Ollama. Les peticions es despatxen en lots concurrents:
+    la càrrega és de xarxa/LLM, així que encavalcar les crides redueix la
+    latència total gairebé linealment amb la mida del lot. El nombre de
+    peticions que el servidor atén alhora es controla amb les variables
+    d'entorn OLLAMA_NUM_PARALLEL i OLLAMA_MAX_LOADED_MODELS.
+    """
+
+    def __init__(self, seed: Optional[int] = None,
+                 ollama: Optional[OllamaClient] = None):
+        self.basic_generator = LanguageGenerator(seed)
+        self.ollama = ollama if ollama is not None else get_ollama_client()
+
+    def _expand_vocabulary_with_ai(
+            self, language: Language, civilization_name: str,
+            environment_type: str,
+            culture_traits: Dict[str, float]) -> Tuple[Language, str]:
+        """Construeix el prompt d'expansió per a una civilització.
+
+        No fa cap crida de xarxa: retorna (llengua, prompt) perquè el
+        despatx es faci en lot des de generate_contextual_languages.
+        """
+        prompt = _PROMPT_TMPL.substitute(
+            civ=civilization_name, env=environment_type,
+            mil=f"{culture_traits.get('militarisme', 0.5) * 100:.0f}",
+            rel=f"{culture_traits.get('religiositat', 0.5) * 100:.0f}",
+            com=f"{culture_traits.get('comerç', 0.5) * 100:.0f}")
+        return language, prompt
+
+    _MULTI_BATCH_SIZE = 12
+
+    @staticmethod
+    def _build_multi_prompt(civ_contexts: List[Dict[str, Any]]) -> str:
+        """Fusiona els contextos de K civilitzacions en un sol prompt.
+
+        El bloc d'instruccions (idèntic per a totes) només es processa
+        una vegada al prefill del model, en lloc de K.
+        """
+        lines = [
+            "Per a cada civilització de la llista, genera exactament 10 "
+            "conceptes (noms comuns, en català, una sola paraula "
+            "cadascun) que serien importants per a la seva cultura.",
+            "Respon només amb un JSON de la forma "
+            "{\"NomCiv\": [\"c1\", ..., \"c10\"], ...} amb una clau "
+            "per civilització.",
+            "",
+            "Civilitzacions:",
+        ]
+        traits_arr = np.empty(len(civ_contexts), CULTURE_DTYPE)
+        for i, civ in enumerate(civ_contexts):
+            traits = civ.get("culture_traits", {})
+            for field_name in CULTURE_DTYPE.names:
+                traits_arr[field_name][i] = traits.get(field_name, 0.5)
+        # Percentatges renderitzats en bloc per camp, no f-string a
+        # f-string dins del bucle.
+        rendered = {
+            field_name: np.char.mod(
+                "%.0f", traits_arr[field_name].astype(np.float32) * 100)
+            for field_name in CULTURE_DTYPE.names}
+        for i, civ in enumerate(civ_contexts):
+            lines.append(_MULTI_CIV_LINE.format_map({
+                "i": i + 1, "name": civ["name"],
+                "env": civ.get("environment", "temperat"),
+                "mil": rendered["militarisme"][i],
+                "rel": rendered["religiositat"][i],
+                "com": rendered["comerç"][i]}))
+        return "\n".join(lines)
+
+    async def _expand_many_async(
+            self, pairs: List[Tuple[Language, str]]) -> List[Any]:
+        """Despatxa tots els prompts alhora i recull respostes en ordre.
+
+        El client és síncron (requests), així que cada crida s'envia en
+        un fil via asyncio.to_thread i asyncio.gather les encavalca.
+        """
+        tasks = [
+            asyncio.to_thread(self.ollama.generate_json, prompt,
+                              0.8, _CONCEPTS_SCHEMA)
+            for _, prompt in pairs
+        ]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    def generate_contextual_languages(
+            self, civs: List[Dict[str, Any]]) -> List[Language]:
+        """Genera una llengua amb vocabulari contextual per a cada civ.
+
+        Cada element de `civs` és un dict amb name, environment i
+        culture_traits. Els N prompts es construeixen primer i es
+        despatxen concurrentment; les respostes es reincorporen al
+        vocabulari en l'ordre original.
+        """
+        languages = [
+            self.basic_generator.generate_language(civ["name"])
+            for civ in civs]
+
+        # Un sol request per lot: el prefill compartit s'amortitza entre
+        # les K civilitzacions del lot.
+        step = self._MULTI_BATCH_SIZE
+        for start in range(0, len(civs), step):
+            batch_civs = civs[start:start + step]
+            batch_langs = languages[start:start + step]
+            try:
+                result = self.ollama.generate_json(
+                    self._build_multi_prompt(batch_civs), temperature=0.8)
+                for civ, language in zip(batch_civs, batch_langs):
+                    self._fold_concepts(language,
+                                        result.get(civ["name"], []))
+            except Exception as exc:
+                # Pla B: peticions per civilització, encavalcades.
+                logger.warning(
+                    "Prompt multi-civ fallit (%s); torno al fan-out "
+                    "per civilització", exc)
+                pairs = [
+                    self._expand_vocabulary_with_ai(
+                        language, civ["name"],
+                        civ.get("environment", "temperat"),
+                        civ.get("culture_traits", {}))
+                    for civ, language in zip(batch_civs, batch_langs)]
+                results = asyncio.run(self._expand_many_async(pairs))
+                for (language, _), result in zip(pairs, results):
+                    if isinstance(result, Exception):
+                        logger.warning(
+                            "Expansió de vocabulari fallida per a %s: %s",
+                            language.name, result)
+                    else:
+                        self._fold_concepts(language,
+                                            result.get("conceptes", []))
+        return languages
+
+    def _fold_concepts(self, language: Language,
+                       concepts: List[str]) -> None:
+        """Afegeix al vocabulari els conceptes nous amb paraules pròpies.
+
+        Una sola diferència de conjunts filtra els conceptes ja coneguts
+        i les paraules del lot restant es generen amb un únic pla RNG.
+        """
+        new_concepts = list(set(concepts[:10]) - language.vocabulary.keys())
+        if not new_concepts:
+            return
+        words = self.basic_generator._generate_words_batch(
+            language, len(new_concepts))
+        for concept, word in zip(new_concepts, words):
+            language.vocabulary[concept] = word
+
+
+class LanguageEvolutionSystem:
+    """Sistema d'evolució lingüística: contactes, manlleus i deriva."""
+
+    _INITIAL_LOAN_CAPACITY = 64
+
+    def __init__(self, seed: Optional[int] = None):
+        self.contacts: List[LinguisticContact] = []
+        # Registre de manlleus en columnes paral·leles (SoA): els noms de
+        # llengua s'internen a enters i els anys viuen en un array int32,
+        # cosa que permet consultes vectoritzades ("manlleus des de l'any
+        # X" via np.searchsorted) i una serialització compacta.
+        self._loan_concepts: List[str] = []
+        self._loan_words: List[str] = []
+        self._loan_src: List[int] = []
+        self._loan_dst: List[int] = []
+        self._loan_year = np.empty(self._INITIAL_LOAN_CAPACITY, np.int32)
+        self._n_loans = 0
+        self._loans_by_lang: Dict[str, List[int]] = {}
+        self._loan_counts_per_lang: Dict[str, int] = {}
+        self._total_loanwords = 0
+        self._lang_ids: Dict[str, int] = {}
+        self._lang_names: List[str] = []
+        self._civ_ids: Dict[str, int] = {}
+        self._civ_names: List[str] = []
+        self.generator = LanguageGenerator(seed)
+        self.rng = np.random.default_rng(seed)
+        # Taules d'adaptació fonològica per llengua (vegeu _adapt_kernel).
+        self._adapt_tables: Dict[str, Tuple[np.ndarray, np.ndarray,
+                                            np.ndarray, np.ndarray]] = {}
+
+    def register_contact(self, civ1_name: str, civ2_name: str,
+                         intensity: float, year: int,
+                         contact_type: str = "comerç") -> LinguisticContact:
+        """Registra un contacte lingüístic entre dues civilitzacions."""
+        contact = LinguisticContact(
+            self._intern_civ(civ1_name), self._intern_civ(civ2_name),
+            intensity, year, contact_type)
+        self.contacts.append(contact)
+        return contact
+
+    def _intern_civ(self, name: str) -> int:
+        """Retorna l'id enter (estable) d'un nom de civilització."""
+        civ_id = self._civ_ids.get(name)
+        if civ_id is None:
+            civ_id = self._civ_ids[name] = len(self._civ_names)
+            self._civ_names.append(name)
+        return civ_id
+
+    def name_of(self, civ_id: int) -> str:
+        """Nom de civilització corresponent a un id intern."""
+        return self._civ_names[civ_id]
+
+    def _intern_lang(self, name: str) -> int:
+        """Retorna l'id enter (estable) d'un nom de llengua."""
+        lang_id = self._lang_ids.get(name)
+        if lang_id is None:
+            lang_id = self._lang_ids[name] = len(self._lang_names)
+            self._lang_names.append(name)
+        return lang_id
+
+    def _record_loan(self, dst_name: str, loan: Loanword) -> None:
+        if self._n_loans == self._loan_year.shape[0]:
+            self._loan_year = np.resize(self._loan_year,
+                                        self._n_loans * 2)
+        row = self._n_loans
+        self._loan_concepts.append(loan.concept)
+        self._loan_words.append(loan.word)
+        self._loan_src.append(self._intern_lang(loan.source_language))
+        self._loan_dst.append(self._intern_lang(dst_name))
+        self._loan_year[row] = loan.year_borrowed
+        self._n_loans = row + 1
+        self._loans_by_lang.setdefault(dst_name, []).append(row)
+        self._loan_counts_per_lang[dst_name] = \
+            self._loan_counts_per_lang.get(dst_name, 0) + 1
+        self._total_loanwords += 1
+
+    def loans_for(self, language_name: str) -> List[Loanword]:
+        """Materialitza els manlleus rebuts per una llengua."""
+        return [
+            Loanword(self._loan_concepts[row], self._loan_words[row],
+                     self._lang_names[self._loan_src[row]],
+                     int(self._loan_year[row]))
+            for row in self._loans_by_lang.get(language_name, [])]
+
+    def loans_since(self, year: int) -> int:
+        """Nombre de manlleus registrats a partir d'un any (inclusiu)."""
+        years = self._loan_year[:self._n_loans]
+        return int(self._n_loans - np.searchsorted(years, year))
+
+    def apply_linguistic_borrowing(self, language1: Language,
+                                   language2: Language, intensity: float,
+                                   year: int) -> List[Loanword]:
+        """Fa que language1 manllevi paraules de language2.
+
+        El nombre de manlleus depèn de la intensitat del contacte; cada
+        paraula s'adapta a la fonologia de la llengua receptora.
+        """
+        num_loans = min(max(1, int(intensity * 5)),
+                        len(language2.vocabulary))
+        # random.sample és O(k): no cal barrejar (i copiar) tot el
+        # vocabulari per quedar-se'n k paraules.
+        loans: List[Loanword] = []
+        for concept in random.sample(language2.vocabulary.keys_list(),
+                                     num_loans):
+            if concept in language1.vocabulary:
+                continue
+            adapted = self._phonological_adaptation(
+                language2.vocabulary[concept], language1)
+            language1.vocabulary[concept] = adapted
+            loan = Loanword(concept, adapted, language2.name, year)
+            self._record_loan(language1.name, loan)
+            loans.append(loan)
+        return loans
+
+    def _adaptation_tables(self, language: Language
+                           ) -> Tuple[np.ndarray, np.ndarray,
+                                      np.ndarray, np.ndarray]:
+        """Taules de punts de codi de l'inventari, calculades una vegada.
+
+        Només els fonemes d'un sol caràcter entren a les taules de
+        substitució: el nucli reemplaça codi per codi.
+        """
+        tables = self._adapt_tables.get(language.name)
+        if tables is None:
+            inventory = language.phoneme_inventory
+            known = np.zeros(_ADAPT_TABLE_SIZE, np.uint8)
+            for ph in inventory.consonants + inventory.vowels:
+                if len(ph) == 1:
+                    known[ord(ph)] = 1
+            stops = np.array([ord(c) for c in inventory.stops_available],
+                             np.int32)
+            cons = np.array([ord(c) for c in inventory.consonants
+                             if len(c) == 1], np.int32)
+            vowels = np.array([ord(v) for v in inventory.vowels
+                               if len(v) == 1], np.int32)
+            tables = self._adapt_tables[language.name] = (known, stops,
+                                                          cons, vowels)
+        return tables
+
+    def _phonological_adaptation(self, word: str,
+                                 target_language: Language) -> str:
+        """Adapta una paraula estrangera a la fonologia de la llengua."""
+        if HAS_NUMBA and word:
+            codes = np.frombuffer(word.encode("utf-32-le"),
+                                  dtype=np.uint32).astype(np.int32)
+            if int(codes.max()) < _ADAPT_TABLE_SIZE:
+                known, stops, cons, vowels = \
+                    self._adaptation_tables(target_language)
+                if cons.shape[0] and vowels.shape[0]:
+                    out = _adapt_kernel(codes, known, _STOP_MASK,
+                                        stops, cons, vowels)
+                    return out.astype(np.uint32).tobytes() \
+                        .decode("utf-32-le")
+        return self._phonological_adaptation_py(word, target_language)
+
+    def _phonological_adaptation_py(self, word: str,
+                                    target_language: Language) -> str:
+        """Variant en Python pur quan numba no està disponible."""
+        inventory = target_language.phoneme_inventory
+        # Construcció amb llista + join: concatenar strings dins del
+        # bucle reassigna un objecte nou per caràcter.
+        out: List[str] = []
+        for char in word:
+            if char in inventory.consonant_set or char in inventory.vowel_set:
+                out.append(char)
+            elif char in _STOPS:
+                # Oclusiva desconeguda: substituïda per una de pròpia.
+                if inventory.stops_available:
+                    out.append(random.choice(inventory.stops_available))
+                else:
+                    out.append(random.choice(inventory.consonants))
+            elif char in 'aeiou':
+                out.append(random.choice(inventory.vowels))
+            else:
+                out.append(random.choice(inventory.consonants))
+        return "".join(out) if out else word
+
+    def evolve_language_over_time(self, language: Language, years: int,
+                                  rate: float = 0.02) -> int:
+        """Aplica deriva fonètica al vocabulari durant `years` anys.
+
+        Retorna el nombre de paraules modificades.
+        """
+        num_changes = min(
+            int(len(language.vocabulary) * rate * years / 100),
+            len(language.vocabulary))
+        if num_changes <= 0:
+            return 0
+        concepts = random.sample(language.vocabulary.keys_list(),
+                                 num_changes)
+        # Totes les decisions aleatòries es tiren d'una vegada: dues
+        # crides al generador vectoritzat en lloc de 2×N crides a
+        # random.* dins del bucle.
+        vowels = language.phoneme_inventory.vowels
+        ops = self.rng.integers(0, len(_SOUND_CHANGES), size=num_changes)
+        vowel_sel = self.rng.integers(0, len(vowels), size=num_changes)
+        changed = 0
+        for k, concept in enumerate(concepts):
+            word = language.vocabulary[concept]
+            new_word = _SOUND_CHANGES[ops[k]](word, vowels[vowel_sel[k]])
+            if new_word != word:
+                language.vocabulary[concept] = new_word
+                changed += 1
+        return changed
+
+    def create_lingua_franca(self, languages: List[Language],
+                             name: str) -> Language:
+        """Crea una llengua franca a partir dels fonemes i paraules més
+        compartits entre un grup de llengües."""
+        from .language import PhonemeInventory, PhonologyRules
+
+        # Counter.most_common fa el recompte en C i el top-K amb un heap
+        # (O(n log k)); res d'acumular llistes intermèdies ni ordenar-ho
+        # tot amb una clau en Python.
+        common_consonants = [c for c, _ in Counter(chain.from_iterable(
+            lang.phoneme_inventory.consonants
+            for lang in languages)).most_common(12)]
+        common_vowels = [v for v, _ in Counter(chain.from_iterable(
+            lang.phoneme_inventory.vowels
+            for lang in languages)).most_common(5)]
+
+        franca = Language(
+            name=name,
+            phoneme_inventory=PhonemeInventory(
+                consonants=tuple(common_consonants),
+                vowels=tuple(common_vowels)),
+            phonology_rules=PhonologyRules(
+                syllable_structures=("CV", "CVC"), max_syllables=2),
+        )
+        # Per a cada concepte, la paraula més estesa entre les llengües.
+        word_votes: Dict[str, Counter] = {}
+        for lang in languages:
+            for concept, word in lang.vocabulary.items():
+                word_votes.setdefault(concept, Counter())[word] += 1
+        for concept, votes in word_votes.items():
+            best = votes.most_common(1)[0][0]
+            franca.vocabulary[concept] = \
+                self._phonological_adaptation(best, franca)
+        return franca
+
+    def get_linguistic_diversity(self, languages: List[Language]) -> float:
+        """Diversitat mitjana (1 - similitud) entre totes les parelles.
+
+        Les N² similituds es calculen amb tres productes de matrius de
+        pertinença (fonemes, conceptes i parelles concepte-paraula) en
+        lloc del doble bucle en Python amb sets per parella: els
+        recomptes d'intersecció surten en bloc de `A @ A.T`.
+        """
+        n = len(languages)
+        if n < 2:
+            return 0.0
+
+        cons_idx: Dict[str, int] = {}
+        vowel_idx: Dict[str, int] = {}
+        concept_idx: Dict[str, int] = {}
+        word_idx: Dict[Tuple[str, str], int] = {}
+        for lang in languages:
+            for ph in lang.phoneme_inventory.consonants:
+                cons_idx.setdefault(ph, len(cons_idx))
+            for ph in lang.phoneme_inventory.vowels:
+                vowel_idx.setdefault(ph, len(vowel_idx))
+            for concept, word in lang.vocabulary.items():
+                concept_idx.setdefault(concept, len(concept_idx))
+                word_idx.setdefault((concept, word), len(word_idx))
+
+        C = np.zeros((n, len(concept_idx)), np.uint8)
+        W = np.zeros((n, len(word_idx)), np.uint8)
+        for i, lang in enumerate(languages):
+            for concept, word in lang.vocabulary.items():
+                C[i, concept_idx[concept]] = 1
+                W[i, word_idx[(concept, word)]] = 1
+
+        phonetic = self._phonetic_similarity_matrix(languages, cons_idx,
+                                                    vowel_idx)
+
+        common = (C @ C.T).astype(np.float64)
+        shared = (W @ W.T).astype(np.float64)
+        lexical = np.divide(shared, common, out=np.zeros_like(shared),
+                            where=common > 0)
+
+        sim = (phonetic + lexical) / 2.0
+        upper = sim[np.triu_indices(n, k=1)]
+        return 1.0 - float(upper.mean())
+
+    @staticmethod
+    def _phonetic_similarity_matrix(languages: List[Language],
+                                    cons_idx: Dict[str, int],
+                                    vowel_idx: Dict[str, int]) -> np.ndarray:
+        """Matriu de similitud fonètica (només triangle superior).
+
+        Amb numba i inventaris globals de ≤64 fonemes, cada inventari es
+        redueix a dues màscores uint64 i el nucli paral·lel fa els
+        AND-popcounts amb prange; si no, producte de matrius de
+        pertinença uint8.
+        """
+        n = len(languages)
+        if HAS_NUMBA and len(cons_idx) <= 64 and len(vowel_idx) <= 64:
+            cmask = np.zeros(n, np.uint64)
+            vmask = np.zeros(n, np.uint64)
+            csize = np.zeros(n, np.int64)
+            vsize = np.zeros(n, np.int64)
+            for i, lang in enumerate(languages):
+                inventory = lang.phoneme_inventory
+                for ph in inventory.consonants:
+                    cmask[i] |= np.uint64(1 << cons_idx[ph])
+                for ph in inventory.vowels:
+                    vmask[i] |= np.uint64(1 << vowel_idx[ph])
+                csize[i] = len(inventory.consonants)
+                vsize[i] = len(inventory.vowels)
+            return _phonetic_sim_kernel(cmask, vmask, csize, vsize)
+
+        P = np.zeros((n, len(cons_idx) + len(vowel_idx)), np.uint8)
+        offset = len(cons_idx)
+        for i, lang in enumerate(languages):
+            for ph in lang.phoneme_inventory.consonants:
+                P[i, cons_idx[ph]] = 1
+            for ph in lang.phoneme_inventory.vowels:
+                P[i, offset + vowel_idx[ph]] = 1
+        inter = (P @ P.T).astype(np.float64)
+        sizes = P.sum(axis=1, dtype=np.int64)
+        union = sizes[:, None] + sizes[None, :] - inter
+        return np.divide(inter, union, out=np.zeros_like(inter),
+                         where=union > 0)
+
+    def _calculate_similarity(self, lang1: Language,
+                              lang2: Language) -> float:
+        """Similitud [0, 1] entre dues llengües (fonemes i lèxic)."""
+        cons1 = lang1.phoneme_inventory.consonant_set
+        cons2 = lang2.phoneme_inventory.consonant_set
+        vow1 = lang1.phoneme_inventory.vowel_set
+        vow2 = lang2.phoneme_inventory.vowel_set
+        union = len(cons1 | cons2) + len(vow1 | vow2)
+        phonetic = (len(cons1 & cons2) + len(vow1 & vow2)) / union \
+            if union else 0.0
+
+        # Les vistes de dict fan la intersecció a nivell de C: una sola
+        # operació en lloc d'un bucle amb dues consultes per concepte.
+        num_common = len(lang1.vocabulary.keys() & lang2.vocabulary.keys())
+        shared_words = len(lang1.vocabulary.items()
+                           & lang2.vocabulary.items())
+        lexical = shared_words / num_common if num_common else 0.0
+        return (phonetic + lexical) / 2.0
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Estadístiques agregades del sistema."""
+        return {
+            "contactes": len(self.contacts),
+            "manlleus": self._total_loanwords,
+            "llengües_amb_manlleus": len(self._loan_counts_per_lang),
+        }
@@ -0,0 +1,362 @@
+"""Demografia de civilitzacions: piràmides de població i migracions.
+
+Les piràmides es poden generar amb IA (Ollama) o proceduralment quan el
+model no està disponible.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from overworld.ai.ollama_client import get_ollama_client
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    numba = None
+    HAS_NUMBA = False
+
+logger = logging.getLogger(__name__)
+
+
+class AgeGroup(Enum):
+    """Grups d'edat de la piràmide de població."""
+    INFANT = "0-4"
+    CHILD = "5-14"
+    YOUTH = "15-24"
+    YOUNG_ADULT = "25-39"
+    ADULT = "40-54"
+    MATURE = "55-64"
+    SENIOR = "65-79"
+    ELDER = "80+"
+
+
+# Camps numèrics que el model ha de retornar, en l'ordre dels grups d'edat.
+_PYRAMID_FIELDS = (
+    "infant_0_4", "child_5_14", "youth_15_24", "young_adult_25_39",
+    "adult_40_54", "mature_55_64", "senior_65_79", "elder_80",
+)
+
+# Esquema JSON passat a Ollama perquè la resposta arribi ben formada
+# (números de debò, no rangs en text).
+_PYRAMID_SCHEMA = {
+    "type": "object",
+    "properties": {name: {"type": "number"} for name in _PYRAMID_FIELDS},
+    "required": list(_PYRAMID_FIELDS),
+}
+
+
+# Percentatges procedurals per tram tecnològic, en l'ordre d'AgeGroup.
+# Es construeixen una sola vegada: la generació procedural es crida milers
+# de cops amb només tres taules diferents.
+_PROCEDURAL_PCT = {
+    # Preindustrial: alta natalitat, alta mortalitat.
+    0: np.array([0.16, 0.24, 0.18, 0.20, 0.12, 0.06, 0.03, 0.01]),
+    # Transició demogràfica.
+    1: np.array([0.12, 0.18, 0.17, 0.21, 0.15, 0.09, 0.06, 0.02]),
+    # Industrial o posterior: piràmide envellida.
+    2: np.array([0.07, 0.11, 0.13, 0.21, 0.19, 0.12, 0.11, 0.06]),
+}
+
+# Factor de pèrdua per guerra als grups en edat militar (YOUTH, YOUNG_ADULT).
+_WAR_LOSS = np.array([1.0, 1.0, 0.9, 0.9, 1.0, 1.0, 1.0, 1.0])
+
+_AGE_GROUPS = tuple(AgeGroup)
+
+# Taula (3, 8) de percentatges per al nucli numèric del camí per lots.
+_PCT_TABLE = np.stack([_PROCEDURAL_PCT[b] for b in range(3)])
+
+
+def _batch_split_py(pops, buckets, pct_table, out_male, out_female):
+    for i in range(pops.shape[0]):
+        counts = (pops[i] * pct_table[buckets[i]]).astype(np.int64)
+        males = (counts * 0.5).astype(np.int64)
+        out_male[i] = males
+        out_female[i] = counts - males
+
+
+if HAS_NUMBA:
+    @numba.njit(parallel=True, cache=True)
+    def _batch_split(pops, buckets, pct_table, out_male, out_female):
+        for i in numba.prange(pops.shape[0]):
+            for j in range(pct_table.shape[1]):
+                count = np.int64(pops[i] * pct_table[buckets[i], j])
+                males = np.int64(count * 0.5)
+                out_male[i, j] = males
+                out_female[i, j] = count - males
+else:
+    _batch_split = _batch_split_py
+
+
+@dataclass
+class Migration:
+    """Moviment migratori entre dues civilitzacions."""
+    source: str
+    destination: str
+    year: int
+    count: int
+    reason: str
+    age_profile: Dict[AgeGroup, float] = field(default_factory=dict)
+
+
+class _MigrationStore:
+    """Emmagatzematge columnar (SoA) de migracions.
+
+    Les simulacions llargues acumulen milions de migracions; guardar-les
+    com a objectes amb un dict de 8 floats cadascun domina la memòria.
+    Aquí cada columna és un array compacte i els objectes `Migration`
+    només es materialitzen sota demanda.
+    """
+
+    _INITIAL_CAPACITY = 256
+
+    def __init__(self):
+        self.n = 0
+        self.source: List[str] = []
+        self.destination: List[str] = []
+        self._reason_id: Dict[str, int] = {}
+        self._reason_name: List[str] = []
+        self.year = np.empty(self._INITIAL_CAPACITY, dtype=np.int32)
+        self.count = np.empty(self._INITIAL_CAPACITY, dtype=np.int32)
+        self.reason = np.empty(self._INITIAL_CAPACITY, dtype=np.int16)
+        self.ages = np.zeros((self._INITIAL_CAPACITY, len(AgeGroup)),
+                             dtype=np.float32)
+
+    def _grow(self) -> None:
+        capacity = self.year.shape[0] * 2
+        self.year = np.resize(self.year, capacity)
+        self.count = np.resize(self.count, capacity)
+        self.reason = np.resize(self.reason, capacity)
+        self.ages = np.resize(self.ages, (capacity, len(AgeGroup)))
+
+    def append(self, migration: Migration) -> None:
+        if self.n == self.year.shape[0]:
+            self._grow()
+        i = self.n
+        self.source.append(migration.source)
+        self.destination.append(migration.destination)
+        self.year[i] = migration.year
+        self.count[i] = migration.count
+        reason_id = self._reason_id.setdefault(migration.reason,
+                                               len(self._reason_name))
+        if reason_id == len(self._reason_name):
+            self._reason_name.append(migration.reason)
+        self.reason[i] = reason_id
+        for j, group in enumerate(_AGE_GROUPS):
+            self.ages[i, j] = migration.age_profile.get(group, 0.0)
+        self.n = i + 1
+
+    def materialize(self, i: int) -> Migration:
+        row = self.ages[i]
+        return Migration(
+            source=self.source[i],
+            destination=self.destination[i],
+            year=int(self.year[i]),
+            count=int(self.count[i]),
+            reason=self._reason_name[self.reason[i]],
+            age_profile={g: float(row[j]) for j, g in enumerate(_AGE_GROUPS)},
+        )
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __iter__(self):
+        return (self.materialize(i) for i in range(self.n))
+
+    def __getitem__(self, i: int) -> Migration:
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        return self.materialize(i)
+
+
+class PopulationPyramid:
+    """Distribució de població per grup d'edat i sexe."""
+
+    def __init__(self, civilization_name: str):
+        self.civilization_name = civilization_name
+        self.male_population: Dict[AgeGroup, int] = {g: 0 for g in AgeGroup}
+        self.female_population: Dict[AgeGroup, int] = {g: 0 for g in AgeGroup}
+        self._dict_cache: Optional[Dict[str, Any]] = None
+
+    def set_group(self, group: AgeGroup, males: int, females: int) -> None:
+        self.male_population[group] = males
+        self.female_population[group] = females
+        self._dict_cache = None
+
+    def get_total_population(self) -> int:
+        return (sum(self.male_population.values())
+                + sum(self.female_population.values()))
+
+    def get_working_age_population(self) -> int:
+        working = (AgeGroup.YOUTH, AgeGroup.YOUNG_ADULT, AgeGroup.ADULT,
+                   AgeGroup.MATURE)
+        return sum(self.male_population[g] + self.female_population[g]
+                   for g in working)
+
+    def get_dependency_ratio(self) -> float:
+        working = self.get_working_age_population()
+        if working == 0:
+            return 0.0
+        return (self.get_total_population() - working) / working
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Les exportacions anuals criden to_dict sobre piràmides que no han
+        # canviat: el resultat es reconstrueix només després d'una mutació.
+        if self._dict_cache is None:
+            self._dict_cache = {
+                "civilization": self.civilization_name,
+                "male": {g.value: n for g, n in self.male_population.items()},
+                "female": {g.value: n
+                           for g, n in self.female_population.items()},
+                "total": self.get_total_population(),
+                "working_age": self.get_working_age_population(),
+                "dependency_ratio": self.get_dependency_ratio(),
+            }
+        return self._dict_cache
+
+
+class CivilizationAISystem:
+    """Generació demogràfica per a civilitzacions, amb o sense IA."""
+
+    def __init__(self):
+        self.ollama = get_ollama_client()
+        self._migrations = _MigrationStore()
+
+    @property
+    def migrations(self) -> _MigrationStore:
+        """Vista perezosa de les migracions registrades."""
+        return self._migrations
+
+    def generate_with_civ_model(self, prompt: str,
+                                schema: Optional[Dict[str, Any]] = None,
+                                temperature: float = 0.7) -> Dict[str, Any]:
+        """Crida el model de civilitzacions forçant JSON vàlid.
+
+        Amb `schema`, Ollama restringeix la generació a l'estructura
+        demanada i no cal cap camí de reintents ni reparació de la
+        resposta.
+        """
+        return self.ollama.generate_json(prompt, temperature=temperature,
+                                         schema=schema)
+
+    @staticmethod
+    def preprocess_events(recent_events: List[str]) -> Tuple[str, bool]:
+        """Normalitza els esdeveniments una sola vegada per a crides en lot.
+
+        Retorna (text en minúscules unit amb "; ", hi_ha_guerra) perquè
+        cada crida de `generate_population_pyramid` no repeteixi el
+        mateix escaneig de subcadenes.
+        """
+        lowered = "; ".join(event.lower() for event in recent_events)
+        return lowered, ("guerra" in lowered or "batalla" in lowered)
+
+    def generate_population_pyramid(
+            self, civilization_name: str, total_population: int,
+            tech_level: int, recent_events: Optional[List[str]] = None,
+            use_ai: bool = True,
+            _preprocessed_events: Optional[Tuple[str, bool]] = None,
+    ) -> PopulationPyramid:
+        """Genera la piràmide de població d'una civilització."""
+        recent_events = recent_events or []
+        if _preprocessed_events is not None:
+            _, has_war = _preprocessed_events
+        else:
+            _, has_war = self.preprocess_events(recent_events)
+        if use_ai and self.ollama.is_available():
+            try:
+                return self._generate_pyramid_with_ai(
+                    civilization_name, total_population, tech_level,
+                    recent_events, has_war)
+            except Exception as exc:
+                logger.warning("Generació amb IA fallida per %s: %s",
+                               civilization_name, exc)
+        return self._generate_pyramid_procedural(
+            civilization_name, total_population, tech_level, has_war)
+
+    def _generate_pyramid_with_ai(self, civilization_name: str,
+                                  total_population: int, tech_level: int,
+                                  recent_events: List[str],
+                                  has_war: bool) -> PopulationPyramid:
+        """Demana al model els percentatges per grup d'edat."""
+        events_text = "; ".join(recent_events) if recent_events else "cap"
+        prompt = (
+            f"Ets un demògraf d'un món simulat. La civilització "
+            f"'{civilization_name}' té {total_population} habitants i nivell "
+            f"tecnològic {tech_level} (0-10). Esdeveniments recents: "
+            f"{events_text}. Retorna el percentatge de població (0-100) de "
+            f"cada grup d'edat. La suma ha de ser 100."
+        )
+        result = self.generate_with_civ_model(prompt, schema=_PYRAMID_SCHEMA)
+
+        age_percentages: Dict[AgeGroup, float] = {}
+        for group, field_name in zip(AgeGroup, _PYRAMID_FIELDS):
+            age_percentages[group] = float(result[field_name])
+
+        total_pct = sum(age_percentages.values())
+        if total_pct <= 0:
+            raise ValueError("percentatges no vàlids del model")
+
+        pyramid = PopulationPyramid(civilization_name)
+        for group, pct in age_percentages.items():
+            count = int(total_population * pct / total_pct)
+            males = int(count * 0.5)
+            pyramid.set_group(group, males, count - males)
+        return pyramid
+
+    def _generate_pyramid_procedural(self, civilization_name: str,
+                                     total_population: int, tech_level: int,
+                                     has_war: bool = False) -> PopulationPyramid:
+        """Piràmide procedural segons el nivell tecnològic."""
+        bucket = 0 if tech_level <= 2 else 1 if tech_level <= 5 else 2
+        pct = _PROCEDURAL_PCT[bucket]
+        if has_war:
+            pct = pct * _WAR_LOSS
+        counts = (total_population * pct).astype(np.int64)
+        males = (counts * 0.5).astype(np.int64)
+
+        pyramid = PopulationPyramid(civilization_name)
+        for i, group in enumerate(_AGE_GROUPS):
+            pyramid.set_group(group, int(males[i]), int(counts[i] - males[i]))
+        return pyramid
+
+    def generate_pyramids_procedural_batch(
+            self, civ_names: List[str], populations: List[int],
+            tech_levels: List[int]) -> List[PopulationPyramid]:
+        """Genera piràmides procedurals per a moltes civilitzacions alhora.
+
+        El treball numèric per civilització és independent, de manera que
+        el nucli es paral·lelitza amb Numba quan està disponible; el bucle
+        Python final només reparteix els resultats en objectes.
+        """
+        n = len(civ_names)
+        pops = np.asarray(populations, dtype=np.int64)
+        techs = np.asarray(tech_levels, dtype=np.int64)
+        buckets = np.where(techs <= 2, 0, np.where(techs <= 5, 1, 2))
+        out_male = np.empty((n, len(AgeGroup)), dtype=np.int64)
+        out_female = np.empty((n, len(AgeGroup)), dtype=np.int64)
+        _batch_split(pops, buckets, _PCT_TABLE, out_male, out_female)
+
+        pyramids = []
+        for i, name in enumerate(civ_names):
+            pyramid = PopulationPyramid(name)
+            for j, group in enumerate(_AGE_GROUPS):
+                pyramid.set_group(group, int(out_male[i, j]),
+                                  int(out_female[i, j]))
+            pyramids.append(pyramid)
+        return pyramids
+
+    def record_migration(self, migration: Migration) -> None:
+        self._migrations.append(migration)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        store = self._migrations
+        return {
+            "total_migrations": store.n,
+            "total_migrants": int(store.count[:store.n].sum()),
+        }
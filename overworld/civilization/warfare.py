@@ -0,0 +1,605 @@
+"""Guerra entre civilitzacions: forces militars, batalles i guerres.
+
+Les batalles es poden resoldre una a una (simulate_battle) o per lots
+(simulate_battles): el camí per lots llegeix els atributs de totes les
+forces d'arrays NumPy paral·lels (SoA) i resol totes les batalles del
+tick amb operacions vectoritzades.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from enum import IntEnum, IntFlag
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .warfare_kernels import (HAS_NUMBA, clamp_warscore, mil_strength,
+                              resolve_battles, warscore_delta)
+
+logger = logging.getLogger(__name__)
+
+# Força màxima de referència per normalitzar el poder militar:
+# 50000 soldats, tecnologia 8, moral/experiència/subministrament neutres.
+_MAX_STRENGTH = 50000 * (1 + 8 * 0.2) * 1.0 * 1.0 * 1.0
+
+
+class WarStatus(IntFlag):
+    """Estat d'una guerra (un bit per estat).
+
+    Com a màscara de bits, comprovar grups d'estats (actiu / acabat) és
+    un sol AND; etiquetes de presentació via ws_label.
+    """
+    ONGOING = 1
+    STALEMATE = 2
+    DECISIVE = 4
+    ENDED_VICTORY = 8
+    ENDED_PEACE = 16
+
+
+_ACTIVE_BITS = WarStatus.ONGOING | WarStatus.STALEMATE | WarStatus.DECISIVE
+
+WS_LABELS = ("en curs", "empat", "decisiva", "acabada (victòria)",
+             "acabada (pau)")
+
+
+def ws_label(status: WarStatus) -> str:
+    """Etiqueta de presentació d'un estat de guerra."""
+    return WS_LABELS[status.value.bit_length() - 1]
+
+
+class BattleOutcome(IntEnum):
+    """Resultat d'una batalla des del punt de vista del vencedor."""
+    DECISIVE_VICTORY = 0
+    VICTORY = 1
+    PYRRHIC_VICTORY = 2
+    STALEMATE = 3
+    RETREAT = 4
+
+
+OUTCOME_LABELS = ("victòria decisiva", "victòria", "victòria pírrica",
+                  "empat", "retirada")
+
+
+@dataclass(slots=True)
+class MilitaryForce:
+    """Força militar d'una civilització."""
+    civilization_name: str
+    soldiers: int
+    tech_level: int  # 0-8
+    morale: int = 70  # 0-100
+    experience: int = 0  # 0-100
+    supply_level: int = 100  # 0-100
+    # Força memoritzada; els mutadors la invaliden.
+    _cached_strength: Optional[float] = field(default=None, repr=False,
+                                              compare=False)
+    # Comptador de versió per a cachés externes (vegeu
+    # calculate_military_power): cada mutació l'incrementa.
+    _version: int = field(default=0, repr=False, compare=False)
+
+    def get_military_strength(self) -> float:
+        """Força de combat efectiva (memoritzada fins a la mutació)."""
+        if self._cached_strength is None:
+            self._cached_strength = mil_strength(
+                self.soldiers, self.tech_level, self.morale,
+                self.experience, self.supply_level)
+        return self._cached_strength
+
+    @staticmethod
+    def strengths(arrays: Dict[str, np.ndarray],
+                  idx: np.ndarray) -> np.ndarray:
+        """Força de combat d'un conjunt de files SoA, vectoritzada."""
+        return (arrays["soldiers"][idx].astype(np.float64)
+                * (1 + arrays["tech_level"][idx] * 0.2)
+                * (0.5 + arrays["morale"][idx] / 200.0)
+                * (0.7 + arrays["experience"][idx] / 333.33)
+                * (0.5 + arrays["supply_level"][idx] / 200.0))
+
+    def apply_casualties(self, count: int, morale_loss: int) -> None:
+        """Aplica un nombre absolut de baixes ja calculat pel cridador.
+
+        Rebre el recompte (i no el percentatge) evita repetir la
+        multiplicació i el truncament que el camp de batalla ja ha fet.
+        """
+        self.soldiers = max(0, self.soldiers - count)
+        self.morale = max(0, self.morale - morale_loss)
+        self._cached_strength = None
+        self._version += 1
+
+    def gain_experience(self, amount: int) -> None:
+        self.experience = min(100, self.experience + amount)
+        self._cached_strength = None
+        self._version += 1
+
+    def restore_supply(self, amount: int) -> None:
+        self.supply_level = min(100, self.supply_level + amount)
+        self._cached_strength = None
+        self._version += 1
+
+
+@dataclass(slots=True)
+class Battle:
+    """Una batalla dins d'una guerra."""
+    war_id: int
+    year: int
+    attacker: str
+    defender: str
+    victor: str
+    outcome: BattleOutcome
+    attacker_casualties: int
+    defender_casualties: int
+    location: str = ""
+    _cached_dict: Optional[Dict[str, Any]] = field(default=None,
+                                                   repr=False,
+                                                   compare=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Les batalles són immutables un cop creades: el dict es
+        # construeix una vegada i es reutilitza a cada autodesat.
+        if self._cached_dict is not None:
+            return self._cached_dict
+        self._cached_dict = {
+            "war_id": self.war_id,
+            "year": self.year,
+            "attacker": self.attacker,
+            "defender": self.defender,
+            "victor": self.victor,
+            "outcome": OUTCOME_LABELS[self.outcome],
+            "attacker_casualties": self.attacker_casualties,
+            "defender_casualties": self.defender_casualties,
+            "location": self.location,
+        }
+        return self._cached_dict
+
+
+# Selecció de resultat i baixes sense branques: l'índex 0/1/2 surt de
+# comparar la ràtio de forces amb els llindars 1.2 i 2.0.
+_WINNER_PCT = np.array((0.15, 0.10, 0.05))
+_LOSER_PCT = np.array((0.15, 0.20, 0.30))
+_RATIO_OUTCOMES = (BattleOutcome.PYRRHIC_VICTORY, BattleOutcome.VICTORY,
+                   BattleOutcome.DECISIVE_VICTORY)
+
+_OUTCOME_BY_CODE = tuple(BattleOutcome)
+
+
+class _BattleStore:
+    """Historial global de batalles en un array estructurat columnar.
+
+    Una fila compacta (~20 B) per batalla en lloc d'un objecte Battle de
+    deu camps; les estadístiques i la serialització recorren memòria
+    contigua i els objectes només es materialitzen sota demanda.
+    """
+
+    _INITIAL_CAPACITY = 1024
+    _DTYPE = np.dtype([
+        ("war_id", "i4"), ("year", "i4"), ("attacker_idx", "i2"),
+        ("defender_idx", "i2"), ("outcome", "u1"), ("victor_idx", "i2"),
+        ("att_cas", "i4"), ("def_cas", "i4")])
+
+    def __init__(self, civ_names: List[str]):
+        self.n = 0
+        self.rows = np.empty(self._INITIAL_CAPACITY, self._DTYPE)
+        # Les localitzacions (rares i de mida variable) van a part.
+        self.locations: List[str] = []
+        self._civ_names = civ_names
+
+    def append(self, war_id: int, year: int, attacker_idx: int,
+               defender_idx: int, outcome_code: int, victor_idx: int,
+               att_cas: int, def_cas: int, location: str = "") -> None:
+        if self.n == self.rows.shape[0]:
+            self.rows = np.resize(self.rows, self.n * 2)
+        row = self.rows[self.n]
+        row["war_id"] = war_id
+        row["year"] = year
+        row["attacker_idx"] = attacker_idx
+        row["defender_idx"] = defender_idx
+        row["outcome"] = outcome_code
+        row["victor_idx"] = victor_idx
+        row["att_cas"] = att_cas
+        row["def_cas"] = def_cas
+        self.locations.append(location)
+        self.n += 1
+
+    def battles_for(self, war_id: int) -> List[Battle]:
+        """Materialitza els objectes Battle d'una guerra."""
+        names = self._civ_names
+        sel = np.nonzero(self.rows["war_id"][:self.n] == war_id)[0]
+        out = []
+        for i in sel:
+            row = self.rows[i]
+            out.append(Battle(
+                int(row["war_id"]), int(row["year"]),
+                names[row["attacker_idx"]], names[row["defender_idx"]],
+                names[row["victor_idx"]],
+                _OUTCOME_BY_CODE[row["outcome"]],
+                int(row["att_cas"]), int(row["def_cas"]),
+                self.locations[i]))
+        return out
+
+
+@dataclass(slots=True)
+class War:
+    """Guerra entre dues civilitzacions.
+
+    Les batalles viuen al _BattleStore columnar del sistema; la
+    propietat `battles` les materialitza sota demanda.
+    """
+    war_id: int
+    aggressor_id: int
+    defender_id: int
+    start_year: int
+    status: WarStatus = WarStatus.ONGOING
+    aggressor_warscore: int = 0  # -100..100
+    end_year: Optional[int] = None
+    num_battles: int = 0
+    store: Optional[_BattleStore] = field(default=None, repr=False,
+                                          compare=False)
+    civ_names: Optional[List[str]] = field(default=None, repr=False,
+                                           compare=False)
+    _cached_dict: Optional[Dict[str, Any]] = field(default=None,
+                                                   repr=False,
+                                                   compare=False)
+
+    @property
+    def aggressor(self) -> str:
+        """Nom de l'agressor (resolt de l'id intern)."""
+        return self.civ_names[self.aggressor_id]
+
+    @property
+    def defender(self) -> str:
+        """Nom del defensor (resolt de l'id intern)."""
+        return self.civ_names[self.defender_id]
+
+    @property
+    def battles(self) -> List[Battle]:
+        if self.store is None:
+            return []
+        return self.store.battles_for(self.war_id)
+
+    def add_battle(self, battle: Battle) -> None:
+        """Actualitza marcador i estat amb el resultat d'una batalla."""
+        self._cached_dict = None
+        self.num_battles += 1
+        delta = warscore_delta(battle.victor == self.aggressor,
+                               int(battle.outcome))
+        self.aggressor_warscore = int(clamp_warscore(
+            self.aggressor_warscore + delta))
+        if abs(self.aggressor_warscore) >= 80:
+            self.status = WarStatus.DECISIVE
+        elif self.num_battles >= 6 and abs(self.aggressor_warscore) < 10:
+            self.status = WarStatus.STALEMATE
+
+    def is_active(self) -> bool:
+        return bool(self.status & _ACTIVE_BITS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Una guerra acabada no canvia mai més: el dict es construeix un
+        # cop i els autodesats posteriors el reutilitzen tal qual.
+        if self._cached_dict is not None:
+            return self._cached_dict
+        self._cached_dict = {
+            "war_id": self.war_id,
+            "aggressor": self.aggressor,
+            "defender": self.defender,
+            "start_year": self.start_year,
+            "status": ws_label(self.status),
+            "aggressor_warscore": self.aggressor_warscore,
+            "end_year": self.end_year,
+            "battles": [battle.to_dict() for battle in self.battles],
+        }
+        return self._cached_dict
+
+
+class WarfareSystem:
+    """Sistema de guerra: forces, declaracions i resolució de batalles."""
+
+    _INITIAL_CAPACITY = 64
+
+    def __init__(self, seed: Optional[int] = None):
+        self.military_forces: Dict[str, MilitaryForce] = {}
+        self.wars: List[War] = []
+        self._next_war_id = 0
+        # Índexs de guerres: actives per id i actives per parella, per
+        # respondre get_active_wars/get_war_between sense escanejar.
+        self._wars_by_id: Dict[int, War] = {}
+        self._active_war_ids: set = set()
+        self._war_by_pair: Dict[frozenset, War] = {}
+        # Codi d'estat (posició de bit) per guerra, indexat per war_id:
+        # el recompte per estat és un sol np.bincount sense hashing de
+        # claus de text.
+        self._statuses = np.zeros(self._INITIAL_CAPACITY, np.int8)
+        # Columnes SoA dels atributs calents de les forces, indexades per
+        # l'id de fila de _civ_idx; el camí per lots hi llegeix i escriu
+        # sense tocar els objectes MilitaryForce fins al final.
+        self._civ_idx: Dict[str, int] = {}
+        self._civ_names: List[str] = []
+        self._battle_store = _BattleStore(self._civ_names)
+        self._force_arrays: Dict[str, np.ndarray] = {
+            name: np.zeros(self._INITIAL_CAPACITY, np.int32)
+            for name in ("soldiers", "tech_level", "morale",
+                         "experience", "supply_level")}
+        self._n_forces = 0
+        # PCG64 propi del sistema amb buffer d'uniformes pel camí
+        # escalar: cap bloqueig sobre l'estat global de random i un sol
+        # ompliment vectoritzat cada 4096 tirades.
+        self._rng = np.random.default_rng(seed)
+        self._uniform_buf = self._rng.random(4096)
+        self._ubuf_i = 0
+        # (versió de la força, poder) per civilització: la UI i la IA
+        # demanen el poder molts cops per tick sense que canviï res.
+        self._power_cache: Dict[str, tuple] = {}
+
+    def _next_u(self) -> float:
+        """Següent uniforme [0, 1) del buffer pre-tirat."""
+        i = self._ubuf_i
+        if i == self._uniform_buf.shape[0]:
+            self._rng.random(out=self._uniform_buf)
+            i = 0
+        self._ubuf_i = i + 1
+        return self._uniform_buf[i]
+
+    # ------------------------------------------------------------------
+    # Registre de forces
+
+    def _intern_civ(self, name: str) -> int:
+        """Assigna (o recupera) l'id enter d'una civilització."""
+        idx = self._civ_idx.get(name)
+        if idx is None:
+            if self._n_forces == self._force_arrays["soldiers"].shape[0]:
+                for key, arr in self._force_arrays.items():
+                    self._force_arrays[key] = np.resize(
+                        arr, self._n_forces * 2)
+            idx = self._civ_idx[name] = self._n_forces
+            self._civ_names.append(name)
+            self._n_forces += 1
+        return idx
+
+    def register_military_force(self, force: MilitaryForce) -> int:
+        """Registra (o substitueix) la força d'una civilització."""
+        idx = self._intern_civ(force.civilization_name)
+        self.military_forces[force.civilization_name] = force
+        self._sync_row(idx, force)
+        return idx
+
+    def _sync_row(self, idx: int, force: MilitaryForce) -> None:
+        """Copia els atributs escalars d'una força a la seva fila SoA."""
+        arrays = self._force_arrays
+        arrays["soldiers"][idx] = force.soldiers
+        arrays["tech_level"][idx] = force.tech_level
+        arrays["morale"][idx] = force.morale
+        arrays["experience"][idx] = force.experience
+        arrays["supply_level"][idx] = force.supply_level
+
+    # ------------------------------------------------------------------
+    # Guerres
+
+    def start_war(self, aggressor: str, defender: str, year: int) -> War:
+        """Comença una guerra entre dues civilitzacions."""
+        war = War(self._next_war_id, self._intern_civ(aggressor),
+                  self._intern_civ(defender), year,
+                  store=self._battle_store, civ_names=self._civ_names)
+        self._next_war_id += 1
+        self.wars.append(war)
+        self._wars_by_id[war.war_id] = war
+        self._active_war_ids.add(war.war_id)
+        if war.war_id >= self._statuses.shape[0]:
+            self._statuses = np.resize(self._statuses,
+                                       self._statuses.shape[0] * 2)
+        self._record_status(war)
+        self._war_by_pair[frozenset((aggressor, defender))] = war
+        logger.info("Guerra declarada: %s contra %s (any %d)",
+                    aggressor, defender, year)
+        return war
+
+    def end_war(self, war: War, year: int,
+                status: WarStatus = WarStatus.ENDED_PEACE) -> None:
+        """Acaba una guerra."""
+        war.status = status
+        war.end_year = year
+        war._cached_dict = None
+        self._record_status(war)
+        self._active_war_ids.discard(war.war_id)
+        self._war_by_pair.pop(frozenset((war.aggressor, war.defender)),
+                              None)
+
+    def _record_status(self, war: War) -> None:
+        """Desa el codi d'estat compacte d'una guerra a la columna."""
+        self._statuses[war.war_id] = war.status.value.bit_length() - 1
+
+    def get_active_wars(self) -> List[War]:
+        return [self._wars_by_id[war_id]
+                for war_id in self._active_war_ids]
+
+    def get_war_between(self, civ1: str, civ2: str) -> Optional[War]:
+        return self._war_by_pair.get(frozenset((civ1, civ2)))
+
+    # ------------------------------------------------------------------
+    # Resolució de batalles
+
+    def simulate_battle(self, war: War, year: int,
+                        location: str = "") -> Optional[Battle]:
+        """Resol una sola batalla d'una guerra (camí escalar)."""
+        attacker_force = self.military_forces.get(war.aggressor)
+        defender_force = self.military_forces.get(war.defender)
+        if attacker_force is None or defender_force is None:
+            return None
+        if attacker_force.soldiers <= 0 or defender_force.soldiers <= 0:
+            return None
+
+        attacker_strength = attacker_force.get_military_strength()
+        defender_strength = defender_force.get_military_strength() * 1.2
+
+        win_probability = attacker_strength / (attacker_strength
+                                               + defender_strength)
+        attacker_wins = self._next_u() < win_probability
+
+        if attacker_wins:
+            ratio = attacker_strength / defender_strength
+            victor = war.aggressor
+        else:
+            ratio = defender_strength / attacker_strength
+            victor = war.defender
+
+        bucket = int(ratio > 1.2) + int(ratio > 2.0)
+        outcome = _RATIO_OUTCOMES[bucket]
+        winner_pct = _WINNER_PCT[bucket]
+        loser_pct = _LOSER_PCT[bucket]
+
+        if attacker_wins:
+            attacker_pct, defender_pct = winner_pct, loser_pct
+        else:
+            attacker_pct, defender_pct = loser_pct, winner_pct
+
+        attacker_casualties = int(attacker_force.soldiers * attacker_pct)
+        defender_casualties = int(defender_force.soldiers * defender_pct)
+        attacker_force.apply_casualties(attacker_casualties,
+                                        int(attacker_pct * 50))
+        defender_force.apply_casualties(defender_casualties,
+                                        int(defender_pct * 50))
+        attacker_force.gain_experience(5)
+        defender_force.gain_experience(5)
+        self._sync_row(war.aggressor_id, attacker_force)
+        self._sync_row(war.defender_id, defender_force)
+
+        battle = Battle(war.war_id, year, war.aggressor, war.defender,
+                        victor, outcome, attacker_casualties,
+                        defender_casualties, location)
+        victor_id = (war.aggressor_id if attacker_wins
+                     else war.defender_id)
+        self._battle_store.append(
+            war.war_id, year, war.aggressor_id, war.defender_id,
+            int(outcome), victor_id, attacker_casualties,
+            defender_casualties, location)
+        war.add_battle(battle)
+        self._record_status(war)
+        return battle
+
+    def simulate_battles(self, wars: List[War],
+                         year: int) -> List[Battle]:
+        """Resol una batalla per a cada guerra del lot, vectoritzat.
+
+        Totes les forces, probabilitats, tirades, percentatges de baixes
+        i resultats es calculen en bloc sobre les columnes SoA; només el
+        registre final de cada batalla torna a objectes Python.
+        """
+        pairs = [(war, war.aggressor_id, war.defender_id)
+                 for war in wars]
+        if not pairs:
+            return []
+
+        arrays = self._force_arrays
+        att_idx = np.array([a for _, a, _ in pairs], np.int64)
+        def_idx = np.array([d for _, _, d in pairs], np.int64)
+
+        alive = ((arrays["soldiers"][att_idx] > 0)
+                 & (arrays["soldiers"][def_idx] > 0))
+        if not alive.all():
+            pairs = [pair for pair, ok in zip(pairs, alive) if ok]
+            att_idx = att_idx[alive]
+            def_idx = def_idx[alive]
+        if not pairs:
+            return []
+        n = len(pairs)
+        rolls = self._rng.random(n)
+
+        if HAS_NUMBA:
+            # Punt d'entrada únic compilat: resol tot el tick (forces,
+            # tirades, baixes, moral, experiència) en una crida nativa.
+            attacker_wins, bucket, att_cas, def_cas = resolve_battles(
+                arrays["soldiers"], arrays["tech_level"],
+                arrays["morale"], arrays["experience"],
+                arrays["supply_level"], att_idx, def_idx, rolls,
+                _WINNER_PCT, _LOSER_PCT)
+        else:
+            att_strength = MilitaryForce.strengths(arrays, att_idx)
+            def_strength = MilitaryForce.strengths(arrays, def_idx) * 1.2
+
+            win_probability = att_strength / (att_strength + def_strength)
+            attacker_wins = rolls < win_probability
+
+            winner_strength = np.where(attacker_wins, att_strength,
+                                       def_strength)
+            loser_strength = np.where(attacker_wins, def_strength,
+                                      att_strength)
+            ratio = winner_strength / loser_strength
+
+            # 0 = pírrica, 1 = victòria, 2 = decisiva.
+            bucket = np.digitize(ratio, (1.2, 2.0))
+            winner_pct = _WINNER_PCT[bucket]
+            loser_pct = _LOSER_PCT[bucket]
+            att_pct = np.where(attacker_wins, winner_pct, loser_pct)
+            def_pct = np.where(attacker_wins, loser_pct, winner_pct)
+
+            att_cas = (arrays["soldiers"][att_idx]
+                       * att_pct).astype(np.int64)
+            def_cas = (arrays["soldiers"][def_idx]
+                       * def_pct).astype(np.int64)
+
+            # Baixes i moral aplicades en bloc a les columnes.
+            np.subtract.at(arrays["soldiers"], att_idx, att_cas)
+            np.subtract.at(arrays["soldiers"], def_idx, def_cas)
+            np.subtract.at(arrays["morale"], att_idx,
+                           (att_pct * 50).astype(np.int32))
+            np.subtract.at(arrays["morale"], def_idx,
+                           (def_pct * 50).astype(np.int32))
+            np.add.at(arrays["experience"], att_idx, 5)
+            np.add.at(arrays["experience"], def_idx, 5)
+            np.clip(arrays["soldiers"], 0, None, out=arrays["soldiers"])
+            np.clip(arrays["morale"], 0, 100, out=arrays["morale"])
+            np.clip(arrays["experience"], 0, 100,
+                    out=arrays["experience"])
+
+        battles: List[Battle] = []
+        for k, (war, a_idx, d_idx) in enumerate(pairs):
+            victor = war.aggressor if attacker_wins[k] else war.defender
+            outcome = _RATIO_OUTCOMES[bucket[k]]
+            battle = Battle(war.war_id, year, war.aggressor, war.defender,
+                            victor, outcome,
+                            int(att_cas[k]), int(def_cas[k]))
+            victor_id = a_idx if attacker_wins[k] else d_idx
+            self._battle_store.append(
+                war.war_id, year, a_idx, d_idx, int(outcome),
+                victor_id, int(att_cas[k]), int(def_cas[k]))
+            war.add_battle(battle)
+            self._record_status(war)
+            battles.append(battle)
+            self._write_back(a_idx, self.military_forces[war.aggressor])
+            self._write_back(d_idx, self.military_forces[war.defender])
+        return battles
+
+    def _write_back(self, idx: int, force: MilitaryForce) -> None:
+        """Reflecteix la fila SoA a l'objecte MilitaryForce."""
+        arrays = self._force_arrays
+        force.soldiers = int(arrays["soldiers"][idx])
+        force.morale = int(arrays["morale"][idx])
+        force.experience = int(arrays["experience"][idx])
+        force.supply_level = int(arrays["supply_level"][idx])
+        force._cached_strength = None
+        force._version += 1
+
+    # ------------------------------------------------------------------
+    # Consultes
+
+    def calculate_military_power(self, civ_name: str) -> float:
+        """Poder militar normalitzat [0, 100] d'una civilització."""
+        force = self.military_forces.get(civ_name)
+        if force is None:
+            return 0.0
+        cached = self._power_cache.get(civ_name)
+        if cached is not None and cached[0] == force._version:
+            return cached[1]
+        power = min(100.0,
+                    force.get_military_strength() / _MAX_STRENGTH * 100.0)
+        self._power_cache[civ_name] = (force._version, power)
+        return power
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Estadístiques agregades del sistema de guerra."""
+        counts = np.bincount(self._statuses[:self._next_war_id],
+                             minlength=len(WS_LABELS))
+        return {
+            "guerres_totals": len(self.wars),
+            "guerres_actives": len(self._active_war_ids),
+            "batalles_totals": self._battle_store.n,
+            "per_estat": {WS_LABELS[i]: int(count)
+                          for i, count in enumerate(counts) if count},
+        }
@@ -0,0 +1 @@
+"""Nucli de la simulació: configuració, temps i esdeveniments."""
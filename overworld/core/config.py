@@ -0,0 +1,106 @@
+"""Configuració del joc i de la simulació.
+
+Totes les configuracions són dataclasses immutables (frozen + slots):
+es passen arreu del motor i així són hashables, compactes i amb el dict
+de serialització construït una sola vegada.
+"""
+
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict
+
+
+def _freeze_dict(config) -> Dict[str, Any]:
+    """Dict de serialització d'una config plana, calculat un sol cop."""
+    return {f.name: getattr(config, f.name)
+            for f in fields(config) if not f.name.startswith("_")}
+
+
+@dataclass(frozen=True, slots=True)
+class WorldConfig:
+    """Paràmetres de generació del món."""
+    width: int = 512
+    height: int = 512
+    seed: int = 0
+    sea_level: float = 0.45
+    mountain_level: float = 0.75
+    _as_dict: Dict[str, Any] = field(default=None, repr=False,
+                                     compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_as_dict", _freeze_dict(self))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._as_dict
+
+
+@dataclass(frozen=True, slots=True)
+class SimulationConfig:
+    """Paràmetres del bucle de simulació."""
+    years_per_tick: int = 1
+    autosave_interval: int = 50
+    max_civilizations: int = 32
+    seed: int = 0
+    _as_dict: Dict[str, Any] = field(default=None, repr=False,
+                                     compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_as_dict", _freeze_dict(self))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._as_dict
+
+
+@dataclass(frozen=True, slots=True)
+class GraphicsConfig:
+    """Paràmetres de presentació."""
+    window_width: int = 1280
+    window_height: int = 720
+    fullscreen: bool = False
+    fps: int = 60
+    _as_dict: Dict[str, Any] = field(default=None, repr=False,
+                                     compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_as_dict", _freeze_dict(self))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._as_dict
+
+
+@dataclass(frozen=True, slots=True)
+class OllamaConfig:
+    """Paràmetres del client Ollama."""
+    base_url: str = "http://localhost:11434"
+    model: str = "llama3.2:3b"
+    timeout: int = 120
+    _as_dict: Dict[str, Any] = field(default=None, repr=False,
+                                     compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_as_dict", _freeze_dict(self))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._as_dict
+
+
+@dataclass(frozen=True, slots=True)
+class GameConfig:
+    """Configuració completa del joc."""
+    world: WorldConfig = field(default_factory=WorldConfig)
+    simulation: SimulationConfig = field(default_factory=SimulationConfig)
+    graphics: GraphicsConfig = field(default_factory=GraphicsConfig)
+    ollama: OllamaConfig = field(default_factory=OllamaConfig)
+    _as_dict: Dict[str, Any] = field(default=None, repr=False,
+                                     compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_as_dict", {
+            "world": self.world.to_dict(),
+            "simulation": self.simulation.to_dict(),
+            "graphics": self.graphics.to_dict(),
+            "ollama": self.ollama.to_dict(),
+        })
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Referències als dicts memoritzats de cada secció."""
+        return self._as_dict
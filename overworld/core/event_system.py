@@ -0,0 +1,655 @@
+"""Sistema d'esdeveniments de la simulació.
+
+Els esdeveniments (desastres, plagues, descobriments...) es generen
+procedimentalment cada any simulat i es reparteixen als subscriptors.
+L'emissió es fa per lots: simulate_year acumula els esdeveniments de
+l'any i els entrega agrupats per tipus, de manera que cada oient rep
+una sola crida per grup en lloc d'una per esdeveniment.
+"""
+
+import heapq
+import json
+import logging
+import queue
+import threading
+from array import array
+from collections import Counter, deque
+
+import numpy as np
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+from dataclasses import dataclass, field
+from enum import Enum
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+#: Tupla buida compartida per als tipus sense oients.
+_EMPTY = ()
+
+#: Màxim d'entregues buidades de cop pel fil consumidor.
+_MAX_DRAIN = 256
+
+# Opcions dels generadors procedurals, com a tuples de mòdul: es
+# construeixen una sola vegada en lloc d'una llista nova per crida.
+_DISASTER_TYPES = (
+    ("terratrèmol", "Un fort terratrèmol sacseja la regió"),
+    ("inundació", "Les riuades neguen els camps de conreu"),
+    ("sequera", "Una sequera persistent asseca rius i pous"),
+    ("erupció", "Un volcà entra en erupció prop de la ciutat"),
+    ("tempesta", "Una gran tempesta arrasa la costa"),
+)
+
+_FAMINE_CAUSES = ("males collites", "una plaga de llagostes",
+                  "un hivern massa llarg", "la guerra als camps")
+
+_DISCOVERIES = ("una nova tècnica de regadiu",
+                "un aliatge més resistent",
+                "una ruta comercial marítima",
+                "un mètode d'escriptura més senzill",
+                "propietats curatives d'una planta")
+
+_CRISIS_CAUSES = ("la devaluació de la moneda",
+                  "el col·lapse d'una ruta comercial",
+                  "l'esgotament d'una mina",
+                  "un excés de despesa militar")
+
+
+class EventType(Enum):
+    """Tipus d'esdeveniment de la simulació."""
+    NATURAL_DISASTER = "desastre_natural"
+    PLAGUE = "plaga"
+    FAMINE = "fam"
+    DISCOVERY = "descobriment"
+    GOOD_HARVEST = "bona_collita"
+    ECONOMIC_CRISIS = "crisi_econòmica"
+    RELIGIOUS_SCHISM = "cisma_religiós"
+    CULTURAL_FLOURISHING = "floriment_cultural"
+
+
+#: Índex compacte de cada tipus per a les columnes empaquetades.
+_TYPE_INDEX = {event_type: i for i, event_type in enumerate(EventType)}
+
+
+class EventPriority(Enum):
+    """Prioritat d'un esdeveniment."""
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+    CRITICAL = 4
+
+
+@dataclass(slots=True)
+class GameEvent:
+    """Un esdeveniment de la simulació."""
+    event_type: EventType
+    year: int
+    day: int
+    title: str
+    description: str
+    priority: EventPriority = EventPriority.MEDIUM
+    affected_civilizations: List[str] = field(default_factory=list)
+    # Valors dels enums fixats en construir: to_dict no repeteix els
+    # accessos a .value per cada esdeveniment serialitzat.
+    _type_str: str = field(init=False, repr=False)
+    _pri_int: int = field(init=False, repr=False)
+    #: Les civilitzacions afectades com a frozenset: pertinença O(1) en
+    #: els filtres de consulta.
+    _aff_set: frozenset = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._type_str = self.event_type.value
+        self._pri_int = self.priority.value
+        self._aff_set = frozenset(self.affected_civilizations)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "event_type": self._type_str,
+            "year": self.year,
+            "day": self.day,
+            "title": self.title,
+            "description": self.description,
+            "priority": self._pri_int,
+            "affected_civilizations": list(self.affected_civilizations),
+        }
+
+
+@dataclass(slots=True)
+class EventGenerator:
+    """Generador procedural d'un tipus d'esdeveniment."""
+    name: str
+    event_type: EventType
+    probability_per_year: float
+    #: Cridat amb (any, civilitzacions, dia); el dia ve pre-tirat en
+    #: bloc per la simulació dins de day_range.
+    generate: Callable[..., Optional[GameEvent]]
+    condition: Optional[Callable[..., bool]] = None
+    #: Prioritat dels esdeveniments que produeix; permet saltar-se el
+    #: generador quan cap oient hi té interès.
+    priority: EventPriority = EventPriority.MEDIUM
+    #: Interval (inclusiu) de dies de l'any on pot caure l'esdeveniment.
+    day_range: Tuple[int, int] = (1, 365)
+
+
+class EventSystem:
+    """Registre i distribució d'esdeveniments.
+
+    Els oients són "batch-capable": reben una llista d'esdeveniments del
+    tipus al qual s'han subscrit. subscribe_single embolcalla un callback
+    d'un sol esdeveniment.
+    """
+
+    def __init__(self, max_history: int = 10000,
+                 safe_dispatch: bool = False,
+                 async_dispatch: bool = False):
+        self.max_history = max_history
+        # Amb safe_dispatch, una excepció en un oient es registra i no
+        # interromp l'entrega; per defecte el camí calent no paga el
+        # try/except.
+        self.safe_dispatch = safe_dispatch
+        # Amb async_dispatch, l'entrega passa per una cua i un únic fil
+        # consumidor que la buida per lots: un oient lent (E/S, render)
+        # no bloqueja el tick de simulació.
+        self.async_dispatch = async_dispatch
+        if async_dispatch:
+            self._out_q: queue.SimpleQueue = queue.SimpleQueue()
+            self._drain_thread = threading.Thread(
+                target=self._drain, daemon=True,
+                name="event-dispatch")
+            self._drain_thread.start()
+        # deque amb maxlen: el retall de l'historial és O(1) per
+        # inserció, sense recopiar la llista sencera.
+        self.events: Deque[GameEvent] = deque(maxlen=max_history)
+        # Claus per valor de l'enum (str): el hash i la igualtat de
+        # cadenes al camí calent d'emissió són més ràpids que els
+        # d'objectes Enum.
+        self.listeners: Dict[str, List[Callable]] = {}
+        # Prioritat mínima d'interès declarada per tipus: el llindar més
+        # baix entre tots els oients subscrits.
+        self._min_interest: Dict[str, int] = {}
+        # Índexs secundaris incrementals: les consultes per tipus,
+        # civilització o any no han d'escanejar tot l'historial.
+        self._by_type: Dict[EventType, Deque[GameEvent]] = {}
+        self._by_civ: Dict[str, Deque[GameEvent]] = {}
+        # Columnes empaquetades (SoA) paral·leles a l'historial: els
+        # escanejos de filtre toquen aquests arrays compactes i només
+        # materialitzen objectes per al resultat final.
+        self._years = array("i")
+        self._days = array("H")
+        self._types = array("B")
+        self._priorities = array("B")
+        # Comptadors incrementals: get_statistics no recorre l'historial.
+        # Per tipus, un buffer C indexat per _TYPE_INDEX: incrementar és
+        # un accés per índex, sense hash de la clau.
+        self._type_counts = array("Q", bytes(8 * len(EventType)))
+        self._priority_counts: Counter = Counter()
+        self._year_counts: Counter = Counter()
+
+    # ------------------------------------------------------------------
+    # Índexs
+
+    def _index(self, event: GameEvent) -> None:
+        self._by_type.setdefault(event.event_type,
+                                 deque()).append(event)
+        for civ in event.affected_civilizations:
+            self._by_civ.setdefault(civ, deque()).append(event)
+        self._years.append(event.year)
+        self._days.append(event.day)
+        type_idx = _TYPE_INDEX[event.event_type]
+        self._types.append(type_idx)
+        self._priorities.append(event.priority.value)
+        self._type_counts[type_idx] += 1
+        self._priority_counts[event.priority.name] += 1
+        self._year_counts[event.year] += 1
+
+    def _unindex_oldest(self, event: GameEvent) -> None:
+        """Treu dels índexs l'esdeveniment més antic (expulsat del
+        deque). Com que els índexs segueixen l'ordre d'inserció, el més
+        antic sempre és al cap de cada estructura."""
+        self._by_type[event.event_type].popleft()
+        if not self._by_type[event.event_type]:
+            del self._by_type[event.event_type]
+        for civ in event.affected_civilizations:
+            self._by_civ[civ].popleft()
+            if not self._by_civ[civ]:
+                del self._by_civ[civ]
+        self._type_counts[_TYPE_INDEX[event.event_type]] -= 1
+        self._priority_counts[event.priority.name] -= 1
+        if not self._priority_counts[event.priority.name]:
+            del self._priority_counts[event.priority.name]
+        self._year_counts[event.year] -= 1
+        if not self._year_counts[event.year]:
+            del self._year_counts[event.year]
+
+    def _evict_for(self, incoming: int) -> None:
+        """Expulsa explícitament els esdeveniments que el deque
+        descartaria en afegir-ne `incoming`, mantenint els índexs."""
+        overflow = len(self.events) + incoming - self.max_history
+        evicted = min(overflow, len(self.events)) if overflow > 0 else 0
+        for _ in range(evicted):
+            self._unindex_oldest(self.events.popleft())
+        if evicted:
+            # Les columnes empaquetades es retallen en bloc, un sol
+            # memmove per lot en lloc d'un per esdeveniment.
+            del self._years[:evicted]
+            del self._days[:evicted]
+            del self._types[:evicted]
+            del self._priorities[:evicted]
+
+    def subscribe(self, event_type: EventType,
+                  callback: Callable[[List[GameEvent]], None],
+                  min_priority: EventPriority = EventPriority.LOW
+                  ) -> None:
+        """Subscriu un oient per lots a un tipus d'esdeveniment.
+
+        min_priority declara la prioritat mínima que interessa a
+        l'oient; serveix de pista perquè la generació pugui saltar-se
+        esdeveniments que ningú escoltarà.
+        """
+        self.listeners.setdefault(event_type.value, []).append(callback)
+        current = self._min_interest.get(event_type.value)
+        if current is None or min_priority.value < current:
+            self._min_interest[event_type.value] = min_priority.value
+
+    def subscribe_single(self, event_type: EventType,
+                         callback: Callable[[GameEvent], None],
+                         min_priority: EventPriority = EventPriority.LOW
+                         ) -> None:
+        """Subscriu un oient d'un sol esdeveniment (embolcallat)."""
+        def _wrapper(batch: List[GameEvent]) -> None:
+            for event in batch:
+                callback(event)
+        self.subscribe(event_type, _wrapper, min_priority)
+
+    def _dispatch(self, event_type_value: str,
+                  group: List[GameEvent]) -> None:
+        """Entrega (o encua) un grup d'esdeveniments d'un mateix tipus."""
+        if self.async_dispatch:
+            self._out_q.put((event_type_value, group))
+            return
+        self._deliver(event_type_value, group)
+
+    def _drain(self) -> None:
+        """Bucle del fil consumidor: buida la cua per lots i entrega.
+
+        El primer get bloqueja; després es buida tot el que hi hagi
+        pendent (fins a _MAX_DRAIN entregues) i s'agrupa per tipus
+        perquè cada oient rebi una sola crida per lot.
+        """
+        while True:
+            batch = [self._out_q.get()]
+            while len(batch) < _MAX_DRAIN:
+                try:
+                    batch.append(self._out_q.get_nowait())
+                except queue.Empty:
+                    break
+            merged: Dict[str, List[GameEvent]] = {}
+            for event_type_value, group in batch:
+                merged.setdefault(event_type_value, []).extend(group)
+            for event_type_value, group in merged.items():
+                self._deliver(event_type_value, group)
+
+    def _deliver(self, event_type_value: str,
+                 group: List[GameEvent]) -> None:
+        listeners = self.listeners.get(event_type_value, _EMPTY)
+        if self.safe_dispatch:
+            for callback in listeners:
+                try:
+                    callback(group)
+                except Exception:
+                    logger.exception(
+                        "Error en un oient d'esdeveniments (%s)",
+                        event_type_value)
+        else:
+            for callback in listeners:
+                callback(group)
+
+    def emit(self, event: GameEvent) -> None:
+        """Emet un sol esdeveniment."""
+        self._evict_for(1)
+        self.events.append(event)
+        self._index(event)
+        self._dispatch(event.event_type.value, [event])
+
+    def emit_batch(self, batch: List[GameEvent]) -> None:
+        """Emet un lot d'esdeveniments amb una sola entrega per tipus.
+
+        Una sola extensió de l'historial i una crida per (tipus, oient)
+        en lloc de N appends i N cerques de diccionari.
+        """
+        if not batch:
+            return
+        # La capacitat de l'historial limita la retenció, no l'entrega:
+        # es despatxa el lot sencer i només es retalla el que es guarda.
+        stored = batch[-self.max_history:]
+        self._evict_for(len(stored))
+        self.events.extend(stored)
+        for event in stored:
+            self._index(event)
+        groups: Dict[str, List[GameEvent]] = {}
+        for event in batch:
+            groups.setdefault(event.event_type.value, []).append(event)
+        for event_type_value, group in groups.items():
+            self._dispatch(event_type_value, group)
+
+    def get_recent_events(self, count: int = 10) -> List[GameEvent]:
+        start = max(0, len(self.events) - count)
+        return list(islice(self.events, start, None))
+
+    def get_events_by_type(self,
+                           event_type: EventType) -> List[GameEvent]:
+        return list(self._by_type.get(event_type, ()))
+
+    def get_events_in_range(self, start_year: int,
+                            end_year: int) -> List[GameEvent]:
+        if not self._years:
+            return []
+        years = np.frombuffer(self._years, dtype=np.int32)
+        idx = np.flatnonzero((years >= start_year) & (years <= end_year))
+        if not idx.size:
+            return []
+        events = list(self.events)
+        return [events[i] for i in idx]
+
+    def export_history(self) -> bytes:
+        """Serialitza tot l'historial a JSON (bytes).
+
+        Amb orjson disponible la serialització en bloc és diversos cops
+        més ràpida que la del mòdul json estàndard.
+        """
+        dicts = [event.to_dict() for event in self.events]
+        if HAS_ORJSON:
+            return orjson.dumps(dicts)
+        return json.dumps(dicts, ensure_ascii=False).encode("utf-8")
+
+    def clear_history(self) -> None:
+        self.events.clear()
+        self._by_type.clear()
+        self._by_civ.clear()
+        del self._years[:]
+        del self._days[:]
+        del self._types[:]
+        del self._priorities[:]
+        for i in range(len(self._type_counts)):
+            self._type_counts[i] = 0
+        self._priority_counts.clear()
+        self._year_counts.clear()
+
+
+class AdvancedEventSystem(EventSystem):
+    """Sistema d'esdeveniments amb generadors procedurals anuals.
+
+    Cada instància té el seu propi generador aleatori: amb la mateixa
+    llavor la seqüència d'esdeveniments és reproduïble, i diverses
+    instàncies poden simular en fils separats sense compartir estat
+    aleatori global.
+    """
+
+    def __init__(self, max_history: int = 10000,
+                 safe_dispatch: bool = False,
+                 seed: Optional[int] = None,
+                 archive_all: bool = True,
+                 async_dispatch: bool = False):
+        super().__init__(max_history, safe_dispatch, async_dispatch)
+        # Amb archive_all=False (mode sense interfície), els generadors
+        # de tipus que cap oient escolta ni tan sols s'executen: tot el
+        # format de cadenes de l'esdeveniment s'estalvia.
+        self.archive_all = archive_all
+        self.event_generators: List[EventGenerator] = []
+        self._nprng = np.random.default_rng(seed)
+        # Vectors per generador en caché (probabilitats i intervals de
+        # dia); es reconstrueixen només quan es registra un generador.
+        self._probs_array: Optional[np.ndarray] = None
+        self._day_lows: Optional[np.ndarray] = None
+        self._day_highs: Optional[np.ndarray] = None
+        self._register_default_generators()
+
+    def register_generator(self, generator: EventGenerator) -> None:
+        self.event_generators.append(generator)
+        self._probs_array = None
+
+    def _ensure_generator_arrays(self) -> None:
+        if self._probs_array is None:
+            self._probs_array = np.array(
+                [g.probability_per_year for g in self.event_generators])
+            self._day_lows = np.array(
+                [g.day_range[0] for g in self.event_generators])
+            self._day_highs = np.array(
+                [g.day_range[1] for g in self.event_generators])
+
+    def _register_default_generators(self) -> None:
+        defaults = [
+            EventGenerator("desastre natural",
+                           EventType.NATURAL_DISASTER, 0.05,
+                           self._generate_natural_disaster,
+                           priority=EventPriority.HIGH),
+            EventGenerator("plaga", EventType.PLAGUE, 0.03,
+                           self._generate_plague,
+                           priority=EventPriority.CRITICAL),
+            EventGenerator("fam", EventType.FAMINE, 0.04,
+                           self._generate_famine,
+                           priority=EventPriority.HIGH),
+            EventGenerator("descobriment", EventType.DISCOVERY, 0.06,
+                           self._generate_discovery,
+                           priority=EventPriority.MEDIUM),
+            EventGenerator("bona collita", EventType.GOOD_HARVEST, 0.10,
+                           self._generate_good_harvest,
+                           priority=EventPriority.LOW,
+                           day_range=(200, 300)),
+            EventGenerator("crisi econòmica",
+                           EventType.ECONOMIC_CRISIS, 0.03,
+                           self._generate_economic_crisis,
+                           priority=EventPriority.HIGH),
+        ]
+        for generator in defaults:
+            self.register_generator(generator)
+
+    # ------------------------------------------------------------------
+    # Bucle anual
+
+    def simulate_year(self, year: int, civilizations: List[str],
+                      context: Optional[Dict[str, Any]] = None
+                      ) -> List[GameEvent]:
+        """Simula els esdeveniments d'un any i els emet en lot."""
+        year_events: List[GameEvent] = []
+        self._ensure_generator_arrays()
+        # Una sola tirada vectoritzada per a tots els generadors en lloc
+        # d'una crida a random.random() per cadascun.
+        mask = self._nprng.random(len(self.event_generators)) \
+            < self._probs_array
+        fired = np.flatnonzero(mask)
+        # Els dies de tots els esdeveniments de l'any, pre-tirats en una
+        # sola crida dins l'interval propi de cada generador.
+        days = self._nprng.integers(self._day_lows[fired],
+                                    self._day_highs[fired] + 1)
+        for i, day in zip(fired, days):
+            generator = self.event_generators[i]
+            if not self.archive_all and not self._has_audience(generator):
+                continue
+            if generator.condition is not None \
+                    and not generator.condition(year, civilizations,
+                                                context):
+                continue
+            event = generator.generate(year, civilizations, int(day))
+            if event is not None:
+                year_events.append(event)
+        self.emit_batch(year_events)
+        return year_events
+
+    def simulate_years_batch(self, start_year: int, n_years: int,
+                             civilizations: List[str],
+                             context: Optional[Dict[str, Any]] = None
+                             ) -> List[GameEvent]:
+        """Simula un bloc d'anys amb una sola tirada (anys × generadors).
+
+        Útil quan el TimeManager completa més d'un any en un tick: una
+        matriu de tirades i una sola emissió en lot per a tot el bloc.
+        """
+        self._ensure_generator_arrays()
+        fired = self._nprng.random(
+            (n_years, len(self.event_generators))) < self._probs_array
+        year_offsets, gen_idx = np.nonzero(fired)
+        days = self._nprng.integers(self._day_lows[gen_idx],
+                                    self._day_highs[gen_idx] + 1)
+        events: List[GameEvent] = []
+        for year_offset, g, day in zip(year_offsets, gen_idx, days):
+            generator = self.event_generators[g]
+            if not self.archive_all and not self._has_audience(generator):
+                continue
+            year = start_year + int(year_offset)
+            if generator.condition is not None \
+                    and not generator.condition(year, civilizations,
+                                                context):
+                continue
+            event = generator.generate(year, civilizations, int(day))
+            if event is not None:
+                events.append(event)
+        self.emit_batch(events)
+        return events
+
+    def _has_audience(self, generator: EventGenerator) -> bool:
+        """Cert si algun oient del tipus arriba a la prioritat del
+        generador."""
+        interest = self._min_interest.get(generator.event_type.value)
+        return interest is not None \
+            and interest <= generator.priority.value
+
+    # ------------------------------------------------------------------
+    # Generadors procedurals
+
+    def _generate_natural_disaster(
+            self, year: int, civilizations: List[str],
+            day: int) -> Optional[GameEvent]:
+        if not civilizations:
+            return None
+        # Una sola crida vectoritzada per a totes les tirades del
+        # generador.
+        d, c = self._nprng.integers(
+            (0, 0), (len(_DISASTER_TYPES), len(civilizations)))
+        name, description = _DISASTER_TYPES[d]
+        civ = civilizations[c]
+        return GameEvent(
+            EventType.NATURAL_DISASTER, year, day,
+            f"{name.capitalize()} a {civ}",
+            f"{description}. La població de {civ} en pateix les "
+            f"conseqüències.",
+            EventPriority.HIGH, [civ])
+
+    def _generate_plague(self, year: int, civilizations: List[str],
+                         day: int) -> Optional[GameEvent]:
+        if not civilizations:
+            return None
+        c, mortality = self._nprng.integers(
+            (0, 5), (len(civilizations), 21))
+        civ = civilizations[c]
+        return GameEvent(
+            EventType.PLAGUE, year, day,
+            f"Plaga a {civ}",
+            f"Una malaltia desconeguda s'estén per {civ} i s'emporta "
+            f"prop del {mortality}% de la població.",
+            EventPriority.CRITICAL, [civ])
+
+    def _generate_famine(self, year: int, civilizations: List[str],
+                         day: int) -> Optional[GameEvent]:
+        if not civilizations:
+            return None
+        c, k = self._nprng.integers(
+            (0, 0), (len(civilizations), len(_FAMINE_CAUSES)))
+        civ = civilizations[c]
+        cause = _FAMINE_CAUSES[k]
+        return GameEvent(
+            EventType.FAMINE, year, day,
+            f"Fam a {civ}",
+            f"La fam colpeja {civ} a causa de {cause}.",
+            EventPriority.HIGH, [civ])
+
+    def _generate_discovery(self, year: int, civilizations: List[str],
+                            day: int) -> Optional[GameEvent]:
+        if not civilizations:
+            return None
+        c, k = self._nprng.integers(
+            (0, 0), (len(civilizations), len(_DISCOVERIES)))
+        civ = civilizations[c]
+        discovery = _DISCOVERIES[k]
+        return GameEvent(
+            EventType.DISCOVERY, year, day,
+            f"Descobriment a {civ}",
+            f"Els savis de {civ} descobreixen {discovery}.",
+            EventPriority.MEDIUM, [civ])
+
+    def _generate_good_harvest(self, year: int, civilizations: List[str],
+                               day: int) -> Optional[GameEvent]:
+        if not civilizations:
+            return None
+        c, surplus = self._nprng.integers(
+            (0, 10), (len(civilizations), 41))
+        civ = civilizations[c]
+        return GameEvent(
+            EventType.GOOD_HARVEST, year, day,
+            f"Collita abundant a {civ}",
+            f"Les collites de {civ} superen en un {surplus}% les de "
+            f"l'any passat.",
+            EventPriority.LOW, [civ])
+
+    def _generate_economic_crisis(self, year: int,
+                                  civilizations: List[str],
+                                  day: int) -> Optional[GameEvent]:
+        if not civilizations:
+            return None
+        c, k = self._nprng.integers(
+            (0, 0), (len(civilizations), len(_CRISIS_CAUSES)))
+        civ = civilizations[c]
+        cause = _CRISIS_CAUSES[k]
+        return GameEvent(
+            EventType.ECONOMIC_CRISIS, year, day,
+            f"Crisi econòmica a {civ}",
+            f"L'economia de {civ} trontolla per {cause}.",
+            EventPriority.HIGH, [civ])
+
+    # ------------------------------------------------------------------
+    # Consultes
+
+    def get_history(self, civilization_name: Optional[str] = None,
+                    event_type: Optional[EventType] = None,
+                    limit: int = 50) -> List[GameEvent]:
+        """Historial filtrat per civilització i/o tipus, més recents
+        primer."""
+        # Partim de l'índex més selectiu disponible en lloc de
+        # l'historial sencer.
+        candidates = self.events
+        if civilization_name is not None:
+            candidates = self._by_civ.get(civilization_name, deque())
+        if event_type is not None:
+            typed = self._by_type.get(event_type, deque())
+            if len(typed) < len(candidates):
+                candidates = typed
+        filtered = []
+        for event in candidates:
+            if event_type is not None and event.event_type != event_type:
+                continue
+            if civilization_name is not None \
+                    and civilization_name not in event._aff_set:
+                continue
+            filtered.append(event)
+        # Top-K amb un monticle: O(N log K) en lloc d'ordenar tot el
+        # filtrat per quedar-nos amb `limit` elements.
+        return heapq.nlargest(limit, filtered,
+                              key=lambda e: (e.year, e.day))
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Estadístiques agregades de l'historial, en O(mida del
+        resultat): els comptadors es mantenen a cada emissió."""
+        return {
+            "total_events": len(self.events),
+            "by_type": {event_type.value: self._type_counts[i]
+                        for event_type, i in _TYPE_INDEX.items()
+                        if self._type_counts[i]},
+            "by_priority": dict(self._priority_counts),
+            "events_per_year": dict(self._year_counts),
+        }
@@ -0,0 +1,84 @@
+"""Gestió del temps de la simulació.
+
+Manté el calendari simulat (any i dia) i tradueix el temps real del
+bucle de joc a dies simulats segons la velocitat seleccionada.
+"""
+
+import logging
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+#: Dies simulats per segon de temps real a velocitat 1x.
+DAYS_PER_SECOND = 30.0
+
+#: Estacions indexades per trimestre del dia de l'any.
+_SEASONS = ("hivern", "primavera", "estiu", "tardor")
+
+
+@dataclass(slots=True)
+class SimulationTime:
+    """Un instant del calendari simulat."""
+    year: int = 0
+    day: int = 1
+    days_per_year: int = 365
+    _total_days: int = field(init=False, default=-1, repr=False)
+
+    def advance(self, days: int) -> int:
+        """Avança `days` dies i retorna quants anys s'han completat."""
+        if self._total_days < 0:
+            self._total_days = self.year * self.days_per_year + self.day
+        self._total_days += days
+        # divmod en lloc del bucle de normalització: O(1) encara que un
+        # tick a alta velocitat passi milers de dies de cop.
+        total = self.day + days - 1
+        years_completed, day0 = divmod(total, self.days_per_year)
+        self.day = day0 + 1
+        self.year += years_completed
+        return years_completed
+
+    @property
+    def total_days(self) -> int:
+        if self._total_days < 0:
+            return self.year * self.days_per_year + self.day
+        return self._total_days
+
+    @property
+    def season(self) -> str:
+        """Estació de l'any corresponent al dia actual."""
+        return _SEASONS[min(3, (self.day - 1) // 91)]
+
+    def format(self) -> str:
+        return f"Any {self.year}, dia {self.day} ({self.season})"
+
+
+class TimeManager:
+    """Tradueix el temps real a temps simulat.
+
+    update() acumula el delta del bucle de joc i avança el calendari en
+    dies sencers; retorna quants anys s'han completat durant el tick
+    perquè el bucle principal pugui disparar les simulacions anuals.
+    """
+
+    def __init__(self, speed: float = 1.0):
+        self.time = SimulationTime()
+        self.speed = speed
+        self.paused = False
+        self._accumulator = 0.0
+
+    def update(self, delta_time: float) -> int:
+        """Avança el temps simulat; retorna els anys completats."""
+        if self.paused:
+            return 0
+        self._accumulator += delta_time * self.speed * DAYS_PER_SECOND
+        whole_days = int(self._accumulator)
+        if whole_days == 0:
+            return 0
+        self._accumulator -= whole_days
+        return self.time.advance(whole_days)
+
+    def set_speed(self, speed: float) -> None:
+        self.speed = max(0.0, speed)
+
+    def toggle_pause(self) -> None:
+        self.paused = not self.paused
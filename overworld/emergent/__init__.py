@@ -0,0 +1,9 @@
+"""Sistemes emergents: economia i política generades per context."""
+
+from overworld.emergent.economic_system import (EconomicSystem,
+                                                EconomicSystemGenerator)
+from overworld.emergent.political_system import (PoliticalSystem,
+                                                 PoliticalSystemGenerator)
+
+__all__ = ["EconomicSystem", "EconomicSystemGenerator",
+           "PoliticalSystem", "PoliticalSystemGenerator"]
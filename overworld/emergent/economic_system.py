@@ -0,0 +1,499 @@
+"""Sistema econòmic emergent de les civilitzacions.
+
+Amb Ollama disponible, el sistema econòmic es genera amb el context
+cultural i geogràfic de la civilització al prompt; si no, un generador
+procedural en deriva un dels trets culturals. Per a mons sencers hi ha
+un camí per lots: tots els prompts es construeixen per endavant i es
+despatxen alhora, de manera que el cost total s'acosta a una sola anada
+i tornada al model en lloc d'una per civilització (ajusteu
+OLLAMA_NUM_PARALLEL al servidor per encavalcar-les de debò).
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    numba = None
+    HAS_NUMBA = False
+
+from overworld.ai.ollama_client import get_ollama_client
+
+logger = logging.getLogger(__name__)
+
+#: Ordre de columnes de la matriu de trets del camí per lots.
+_TRAIT_COLUMNS = ("comerç", "navegació", "mineria", "agricultura",
+                  "autoritarisme", "artesania")
+
+#: Mida màxima de la caché de respostes per prompt.
+_CACHE_SIZE = 512
+
+#: Recursos minerals que activen l'arquetip miner. frozenset: la
+#: pertinença es resol per hash en lloc d'escanejar una llista.
+_MINERAL_RESOURCES = frozenset(("Or", "Plata", "Ferro", "Coure",
+                                "Gemmes"))
+
+
+def encode_resource_flags(resource_lists: List[List[str]]) -> "np.ndarray":
+    """Codifica les llistes de recursos en la màscara del camí per lots.
+
+    Es calcula una sola vegada per lot: val 1 si la civilització té
+    algun recurs mineral i 0 si no, en el format uint8 que esperen els
+    classificadors compilats.
+    """
+    return np.fromiter(
+        (not _MINERAL_RESOURCES.isdisjoint(resources)
+         for resources in resource_lists),
+        dtype=np.uint8, count=len(resource_lists))
+
+#: Cos estàtic del prompt, parsejat una sola vegada a nivell de mòdul;
+#: cada crida només omple els camps amb format_map.
+_ECON_PROMPT_TEMPLATE = """\
+Ets un historiador expert en economies antigues.
+Dissenya el sistema econòmic d'una civilització fictícia.
+
+Civilització: {civilization_name} ({coastal_str})
+Entorn: {environment_type}
+Població: {population_fmt}
+Recursos disponibles: {resources_str}
+Trets culturals (0-100):
+{traits_str}
+Història recent:
+{history_str}
+
+Respon NOMÉS amb un objecte JSON amb aquests camps:
+{{"name": "nom del sistema", "system_type": "tipus",
+"description": "dues frases", "currency_name": "nom de la moneda",
+"taxation_level": 0-100, "trade_openness": 0-100,
+"market_freedom": 0-100, "wealth_distribution": 0-100,
+"merchant_class_power": 0-100, "state_intervention": 0-100,
+"innovation_focus": 0-100, "exports": ["..."], "imports": ["..."]}}"""
+
+# Taula d'arquetips del camí procedural: (predicat, arquetip). Es
+# recorre una sola vegada i guanya el primer predicat cert; l'últim és
+# el de reserva. Les cadenes ja estan construïdes a l'arquetip, així
+# que la funció queda en una cerca més una construcció de dataclass.
+_ECON_ARCHETYPES = (
+    (lambda t, coastal, res: coastal and t.get("navegació", 50) > 70,
+     {"name_prefix": "Talasso", "suffixes": ("cràcia", "isme", "at"),
+      "system_type": "talassocràcia mercantil",
+      "description": "Economia bolcada al mar: les flotes mercants i "
+                     "els ports dicten la riquesa.",
+      "currency_name": "dracma de sal",
+      "taxation_level": 25, "trade_openness": 90, "market_freedom": 75,
+      "wealth_distribution": 35, "merchant_class_power": 85,
+      "state_intervention": 30, "innovation_focus": 60,
+      "exports": ["peix salat", "teixits"], "imports": ["gra"]}),
+    (lambda t, coastal, res: t.get("mineria", 50) > 70
+     or not _MINERAL_RESOURCES.isdisjoint(res),
+     {"name_prefix": "Metal·lo", "suffixes": ("cràcia", "úrgia", "isme"),
+      "system_type": "economia minera",
+      "description": "Les vetes de mineral són l'eix de tot: mines, "
+                     "foneries i gremis d'extracció.",
+      "currency_name": "lingot segellat",
+      "taxation_level": 45, "trade_openness": 60, "market_freedom": 50,
+      "wealth_distribution": 30, "merchant_class_power": 55,
+      "state_intervention": 60, "innovation_focus": 55,
+      "exports": ["metalls", "eines"], "imports": ["aliments"]}),
+    (lambda t, coastal, res: t.get("comerç", 50) > 70,
+     {"name_prefix": "Mercantil", "suffixes": ("isme", "at", "ia"),
+      "system_type": "mercantilisme",
+      "description": "Els mercats i les caravanes mouen la ciutat; el "
+                     "regateig és gairebé un ritu.",
+      "currency_name": "moneda de fira",
+      "taxation_level": 30, "trade_openness": 85, "market_freedom": 80,
+      "wealth_distribution": 40, "merchant_class_power": 80,
+      "state_intervention": 25, "innovation_focus": 50,
+      "exports": ["manufactures"], "imports": ["matèries primeres"]}),
+    (lambda t, coastal, res: t.get("agricultura", 50) > 70,
+     {"name_prefix": "Agrari", "suffixes": ("isme", "at", "ia"),
+      "system_type": "economia agrària",
+      "description": "El calendari de collites marca la vida; el "
+                     "graner comunal és el tresor públic.",
+      "currency_name": "mesura de gra",
+      "taxation_level": 35, "trade_openness": 40, "market_freedom": 45,
+      "wealth_distribution": 55, "merchant_class_power": 30,
+      "state_intervention": 50, "innovation_focus": 35,
+      "exports": ["gra", "bestiar"], "imports": ["metalls"]}),
+    (lambda t, coastal, res: t.get("artesania", 50) > 70,
+     {"name_prefix": "Gremial", "suffixes": ("isme", "at", "ia"),
+      "system_type": "economia gremial",
+      "description": "Els gremis d'artesans controlen oficis, preus i "
+                     "aprenentatges.",
+      "currency_name": "fitxa de gremi",
+      "taxation_level": 40, "trade_openness": 55, "market_freedom": 40,
+      "wealth_distribution": 50, "merchant_class_power": 45,
+      "state_intervention": 45, "innovation_focus": 65,
+      "exports": ["artesania"], "imports": ["matèries primeres"]}),
+    (lambda t, coastal, res: True,
+     {"name_prefix": "Subsistència", "suffixes": ("",),
+      "system_type": "economia de subsistència",
+      "description": "Intercanvi directe i autosuficiència: cada llar "
+                     "produeix gairebé tot el que consumeix.",
+      "currency_name": "bescanvi",
+      "taxation_level": 15, "trade_openness": 20, "market_freedom": 60,
+      "wealth_distribution": 70, "merchant_class_power": 15,
+      "state_intervention": 20, "innovation_focus": 25,
+      "exports": [], "imports": []}),
+)
+
+#: Arquetips indexats pel codi que retorna el classificador per lots
+#: (mateix ordre que la taula de predicats).
+_ECON_ARCHETYPE_BY_CODE = tuple(a for _, a in _ECON_ARCHETYPES)
+
+#: Nombre de sufixos per arquetip, per a tirades d'índex en bloc.
+_ECON_SUFFIX_COUNTS = np.array([len(a["suffixes"])
+                                for a in _ECON_ARCHETYPE_BY_CODE])
+
+
+if HAS_NUMBA:
+    @numba.njit(parallel=True, cache=True)
+    def _classify_econ(traits, is_coastal, res_flags, out):
+        """Classifica cada fila de trets en un codi d'arquetip.
+
+        Mateixos llindars que la taula de predicats; columnes segons
+        _TRAIT_COLUMNS. Files independents: bucle prange.
+        """
+        for i in numba.prange(traits.shape[0]):
+            if is_coastal[i] and traits[i, 1] > 70:
+                out[i] = 0
+            elif traits[i, 2] > 70 or res_flags[i] != 0:
+                out[i] = 1
+            elif traits[i, 0] > 70:
+                out[i] = 2
+            elif traits[i, 3] > 70:
+                out[i] = 3
+            elif traits[i, 5] > 70:
+                out[i] = 4
+            else:
+                out[i] = 5
+else:
+    def _classify_econ(traits, is_coastal, res_flags, out):
+        """Variant numpy del classificador: np.select amb els mateixos
+        llindars que la taula de predicats."""
+        conditions = [
+            (is_coastal != 0) & (traits[:, 1] > 70),
+            (traits[:, 2] > 70) | (res_flags != 0),
+            traits[:, 0] > 70,
+            traits[:, 3] > 70,
+            traits[:, 5] > 70,
+        ]
+        out[:] = np.select(conditions, (0, 1, 2, 3, 4), default=5)
+
+
+@dataclass(slots=True)
+class EconomicSystem:
+    """Sistema econòmic d'una civilització.
+
+    Amb slots: sense __dict__ per instància, menys memòria i accés
+    d'atribut més ràpid quan es construeixen sistemes en bloc.
+    """
+    name: str
+    system_type: str
+    description: str
+    currency_name: str
+    taxation_level: int
+    trade_openness: int
+    market_freedom: int
+    wealth_distribution: int
+    merchant_class_power: int
+    state_intervention: int
+    innovation_focus: int
+    primary_resources: List[str] = field(default_factory=list)
+    exports: List[str] = field(default_factory=list)
+    imports: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "system_type": self.system_type,
+            "description": self.description,
+            "currency_name": self.currency_name,
+            "taxation_level": self.taxation_level,
+            "trade_openness": self.trade_openness,
+            "market_freedom": self.market_freedom,
+            "wealth_distribution": self.wealth_distribution,
+            "merchant_class_power": self.merchant_class_power,
+            "state_intervention": self.state_intervention,
+            "innovation_focus": self.innovation_focus,
+            "primary_resources": list(self.primary_resources),
+            "exports": list(self.exports),
+            "imports": list(self.imports),
+        }
+
+
+class EconomicSystemGenerator:
+    """Genera sistemes econòmics amb Ollama o procedimentalment."""
+
+    def __init__(self):
+        self.ollama = get_ollama_client()
+        self._nprng = np.random.default_rng()
+        # Caché adreçada per contingut: contextos idèntics (mateix
+        # entorn, trets i història) generen el mateix prompt i no
+        # tornen a pagar la latència del model. Es guarda el JSON cru.
+        self._cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # Caché de prompts
+
+    @staticmethod
+    def _prompt_key(prompt: str) -> bytes:
+        return hashlib.blake2b(prompt.encode(),
+                               digest_size=16).digest()
+
+    def _cache_get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+        return result
+
+    def _cache_put(self, key: bytes, result: Dict[str, Any]) -> None:
+        self._cache[key] = result
+        if len(self._cache) > _CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Generació
+
+    def generate_system(self, civilization_name: str,
+                        culture_traits: Dict[str, float],
+                        environment_type: str,
+                        population: int,
+                        available_resources: List[str],
+                        is_coastal: bool = False,
+                        recent_history: Optional[List[str]] = None
+                        ) -> EconomicSystem:
+        """Genera el sistema econòmic d'una civilització."""
+        if self.ollama.is_available():
+            try:
+                return self._generate_with_ai(
+                    civilization_name, culture_traits, environment_type,
+                    population, available_resources, is_coastal,
+                    recent_history)
+            except Exception as exc:
+                logger.warning(
+                    "Generació econòmica amb IA fallida per a %s: %s",
+                    civilization_name, exc)
+        return self._generate_procedural(civilization_name,
+                                         culture_traits,
+                                         available_resources, is_coastal)
+
+    def generate_systems_batch(self, contexts: List[Dict[str, Any]]
+                               ) -> List[EconomicSystem]:
+        """Genera els sistemes de diverses civilitzacions alhora.
+
+        Cada context porta els mateixos arguments que generate_system.
+        Els prompts es construeixen tots per endavant i es despatxen
+        concurrentment; una resposta fallida cau al camí procedural
+        sense perdre la resta del lot.
+        """
+        if not contexts:
+            return []
+        if not self.ollama.is_available():
+            return [self._procedural_from_context(ctx)
+                    for ctx in contexts]
+        prompts = [self._build_prompt(**ctx) for ctx in contexts]
+        keys = [self._prompt_key(prompt) for prompt in prompts]
+        # Només es despatxen els prompts que ni són a la caché ni es
+        # repeteixen dins del lot.
+        misses: "OrderedDict[bytes, str]" = OrderedDict()
+        for key, prompt in zip(keys, prompts):
+            if key not in self._cache and key not in misses:
+                misses[key] = prompt
+        fetched: Dict[bytes, Any] = {}
+        if misses:
+            results = asyncio.run(
+                self._generate_many_async(list(misses.values())))
+            fetched = dict(zip(misses.keys(), results))
+        systems: List[EconomicSystem] = []
+        for ctx, key in zip(contexts, keys):
+            cached = self._cache_get(key)
+            result = cached if cached is not None else fetched.get(key)
+            if result is None or isinstance(result, Exception):
+                logger.warning(
+                    "Generació econòmica fallida per a %s: %s",
+                    ctx["civilization_name"], result)
+                systems.append(self._procedural_from_context(ctx))
+                continue
+            # Una resposta pot ser JSON vàlid però mal formada (camps
+            # amb el tipus equivocat): cau al camí procedural sense
+            # perdre la resta del lot, i no es cacheja mai.
+            try:
+                system = self._from_json(
+                    ctx["civilization_name"], result,
+                    ctx.get("available_resources", []))
+            except Exception as exc:
+                logger.warning(
+                    "Resposta econòmica mal formada per a %s: %s",
+                    ctx["civilization_name"], exc)
+                systems.append(self._procedural_from_context(ctx))
+                continue
+            if cached is None:
+                self._cache_put(key, result)
+            systems.append(system)
+        return systems
+
+    async def _generate_many_async(self, prompts: List[str]) -> List[Any]:
+        """Despatxa tots els prompts alhora sobre el pool del client."""
+        return await self.ollama.generate_json_many(prompts, 0.9)
+
+    def _procedural_from_context(self, ctx: Dict[str, Any]
+                                 ) -> EconomicSystem:
+        return self._generate_procedural(
+            ctx["civilization_name"], ctx["culture_traits"],
+            ctx.get("available_resources", []),
+            ctx.get("is_coastal", False))
+
+    # ------------------------------------------------------------------
+    # Camí amb IA
+
+    def _build_prompt(self, civilization_name: str,
+                      culture_traits: Dict[str, float],
+                      environment_type: str,
+                      population: int,
+                      available_resources: List[str],
+                      is_coastal: bool = False,
+                      recent_history: Optional[List[str]] = None) -> str:
+        """Construeix el prompt (pur: no envia res al model)."""
+        ctx = {
+            "civilization_name": civilization_name,
+            "coastal_str": "costanera" if is_coastal else "interior",
+            "environment_type": environment_type,
+            "population_fmt": f"{population:,}",
+            "resources_str": ", ".join(available_resources)
+            if available_resources else "cap recurs destacat",
+            "traits_str": "\n".join(
+                f"- {name}: {value}"
+                for name, value in culture_traits.items()),
+            "history_str": "\n".join(f"- {fact}"
+                                     for fact in recent_history)
+            if recent_history else "- Sense esdeveniments registrats",
+        }
+        return _ECON_PROMPT_TEMPLATE.format_map(ctx)
+
+    def _generate_with_ai(self, civilization_name: str,
+                          culture_traits: Dict[str, float],
+                          environment_type: str,
+                          population: int,
+                          available_resources: List[str],
+                          is_coastal: bool = False,
+                          recent_history: Optional[List[str]] = None
+                          ) -> EconomicSystem:
+        prompt = self._build_prompt(civilization_name, culture_traits,
+                                    environment_type, population,
+                                    available_resources, is_coastal,
+                                    recent_history)
+        key = self._prompt_key(prompt)
+        cached = self._cache_get(key)
+        result = cached if cached is not None \
+            else self.ollama.generate_json(prompt, temperature=0.9)
+        # Com al camí per lots: només es cacheja una resposta que s'ha
+        # materialitzat bé; si _from_json rebenta, l'excepció puja i
+        # generate_system cau al camí procedural sense pinçar-la al LRU.
+        system = self._from_json(civilization_name, result,
+                                 available_resources)
+        if cached is None:
+            self._cache_put(key, result)
+        return system
+
+    def _from_json(self, civilization_name: str, result: Dict[str, Any],
+                   available_resources: List[str]) -> EconomicSystem:
+        return EconomicSystem(
+            name=result.get("name", f"Economia de {civilization_name}"),
+            system_type=result.get("system_type", "mercantilisme"),
+            description=result.get("description", ""),
+            currency_name=result.get("currency_name", "moneda local"),
+            taxation_level=int(result.get("taxation_level", 30)),
+            trade_openness=int(result.get("trade_openness", 50)),
+            market_freedom=int(result.get("market_freedom", 50)),
+            wealth_distribution=int(result.get("wealth_distribution",
+                                               40)),
+            merchant_class_power=int(result.get("merchant_class_power",
+                                                50)),
+            state_intervention=int(result.get("state_intervention", 40)),
+            innovation_focus=int(result.get("innovation_focus", 50)),
+            primary_resources=list(available_resources),
+            exports=list(result.get("exports", [])),
+            imports=list(result.get("imports", [])),
+        )
+
+    # ------------------------------------------------------------------
+    # Camí procedural
+
+    def generate_procedural_batch(self, civilization_names: List[str],
+                                  traits: "np.ndarray",
+                                  is_coastal: "np.ndarray",
+                                  resource_flags: "np.ndarray",
+                                  available_resources:
+                                  Optional[List[List[str]]] = None
+                                  ) -> List[EconomicSystem]:
+        """Classifica i construeix N sistemes procedurals de cop.
+
+        traits és una matriu (N, 6) float32 amb columnes _TRAIT_COLUMNS,
+        is_coastal un vector (N,) i resource_flags la màscara de
+        recursos minerals per civilització (encode_resource_flags la
+        construeix a partir de les llistes). El llindarat corre compilat
+        (o amb np.select sense numba) i Python només materialitza els
+        dataclasses a partir dels codis.
+        """
+        n = len(civilization_names)
+        codes = np.empty(n, np.uint8)
+        _classify_econ(traits, is_coastal, resource_flags, codes)
+        # Tots els índexs de sufix del lot en una sola tirada.
+        suffix_idx = self._nprng.integers(0, _ECON_SUFFIX_COUNTS[codes])
+        systems: List[EconomicSystem] = []
+        for i in range(n):
+            archetype = _ECON_ARCHETYPE_BY_CODE[codes[i]]
+            resources = available_resources[i] \
+                if available_resources is not None else []
+            systems.append(self._from_archetype(
+                civilization_names[i], archetype, resources,
+                int(suffix_idx[i])))
+        return systems
+
+    def _generate_procedural(self, civilization_name: str,
+                             culture_traits: Dict[str, float],
+                             available_resources: List[str],
+                             is_coastal: bool = False) -> EconomicSystem:
+        """Deriva un sistema econòmic dels trets culturals."""
+        for predicate, archetype in _ECON_ARCHETYPES:
+            if predicate(culture_traits, is_coastal,
+                         available_resources):
+                break
+        return self._from_archetype(civilization_name, archetype,
+                                    available_resources)
+
+    def _from_archetype(self, civilization_name: str,
+                        archetype: Dict[str, Any],
+                        available_resources: List[str],
+                        suffix_idx: Optional[int] = None
+                        ) -> EconomicSystem:
+        suffixes = archetype["suffixes"]
+        if suffix_idx is None:
+            suffix_idx = random.randrange(len(suffixes))
+        suffix = suffixes[suffix_idx]
+        return EconomicSystem(
+            name=f"{archetype['name_prefix']}{suffix} de "
+                 f"{civilization_name}",
+            system_type=archetype["system_type"],
+            description=archetype["description"],
+            currency_name=archetype["currency_name"],
+            taxation_level=archetype["taxation_level"],
+            trade_openness=archetype["trade_openness"],
+            market_freedom=archetype["market_freedom"],
+            wealth_distribution=archetype["wealth_distribution"],
+            merchant_class_power=archetype["merchant_class_power"],
+            state_intervention=archetype["state_intervention"],
+            innovation_focus=archetype["innovation_focus"],
+            primary_resources=list(available_resources),
+            exports=list(archetype["exports"]),
+            imports=list(archetype["imports"]))
@@ -0,0 +1,389 @@
+"""Sistema polític emergent de les civilitzacions.
+
+Mateix esquema que el sistema econòmic: Ollama amb context quan hi és,
+generador procedural de reserva, i un camí per lots que construeix tots
+els prompts per endavant i els despatxa alhora per pagar una sola
+latència de model per món en lloc d'una per civilització.
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    numba = None
+    HAS_NUMBA = False
+
+from overworld.ai.ollama_client import get_ollama_client
+
+logger = logging.getLogger(__name__)
+
+#: Ordre de columnes de la matriu de trets del camí per lots.
+_TRAIT_COLUMNS = ("religiositat", "militarisme", "autoritarisme",
+                  "comerç", "tradició")
+
+#: Mida màxima de la caché de respostes per prompt.
+_CACHE_SIZE = 512
+
+#: Cos estàtic del prompt, parsejat una sola vegada a nivell de mòdul.
+_POL_PROMPT_TEMPLATE = """\
+Ets un historiador expert en institucions antigues.
+Dissenya el sistema polític d'una civilització fictícia.
+
+Civilització: {civilization_name}
+Població: {population_fmt}
+Trets culturals (0-100):
+{traits_str}
+Història recent:
+{history_str}
+
+Respon NOMÉS amb un objecte JSON amb aquests camps:
+{{"name": "nom del sistema", "system_type": "tipus",
+"description": "dues frases", "leader_title": "títol del líder",
+"succession_method": "com es transmet el poder",
+"centralization": 0-100, "personal_freedom": 0-100,
+"legitimacy_source": "d'on emana la legitimitat"}}"""
+
+# Taula d'arquetips del camí procedural, com al generador econòmic:
+# primer predicat cert guanya, l'últim és el de reserva.
+_POL_ARCHETYPES = (
+    (lambda t: t.get("religiositat", 50) > 70,
+     {"name_prefix": "Teo", "suffixes": ("cràcia", "arquia"),
+      "system_type": "teocràcia",
+      "description": "El clergat governa en nom dels déus; la llei i "
+                     "el ritu són la mateixa cosa.",
+      "leader_title": "summe sacerdot",
+      "succession_method": "elecció entre el clergat",
+      "centralization": 75, "personal_freedom": 30,
+      "legitimacy_source": "mandat diví"}),
+    (lambda t: t.get("militarisme", 50) > 70,
+     {"name_prefix": "Estrato", "suffixes": ("arquia", "cràcia"),
+      "system_type": "estratocràcia",
+      "description": "Els generals manen i la carrera militar és "
+                     "l'única via cap al poder.",
+      "leader_title": "general suprem",
+      "succession_method": "ascens per mèrits de guerra",
+      "centralization": 85, "personal_freedom": 25,
+      "legitimacy_source": "força de les armes"}),
+    (lambda t: t.get("autoritarisme", 50) > 70,
+     {"name_prefix": "Mon", "suffixes": ("arquia", "at"),
+      "system_type": "monarquia absoluta",
+      "description": "Una sola dinastia concentra tot el poder i el "
+                     "transmet per sang.",
+      "leader_title": "monarca",
+      "succession_method": "herència dinàstica",
+      "centralization": 90, "personal_freedom": 35,
+      "legitimacy_source": "llinatge"}),
+    (lambda t: t.get("comerç", 50) > 70,
+     {"name_prefix": "Pluto", "suffixes": ("cràcia", "at"),
+      "system_type": "plutocràcia mercantil",
+      "description": "Les grans cases comercials compren càrrecs i "
+                     "escons; governa qui paga.",
+      "leader_title": "primer magistrat",
+      "succession_method": "elecció entre les cases riques",
+      "centralization": 50, "personal_freedom": 60,
+      "legitimacy_source": "riquesa"}),
+    (lambda t: t.get("tradició", 50) > 70,
+     {"name_prefix": "Geronto", "suffixes": ("arquia", "ia"),
+      "system_type": "consell d'ancians",
+      "description": "Els més vells de cada llinatge deliberen fins "
+                     "al consens; el costum és llei.",
+      "leader_title": "ancià major",
+      "succession_method": "antiguitat",
+      "centralization": 40, "personal_freedom": 55,
+      "legitimacy_source": "costum ancestral"}),
+    (lambda t: True,
+     {"name_prefix": "Assemblea", "suffixes": ("",),
+      "system_type": "assemblea tribal",
+      "description": "Les decisions es prenen en assemblea oberta; el "
+                     "cap només parla primer.",
+      "leader_title": "cap electe",
+      "succession_method": "aclamació de l'assemblea",
+      "centralization": 30, "personal_freedom": 75,
+      "legitimacy_source": "consentiment de la comunitat"}),
+)
+
+#: Arquetips indexats pel codi del classificador per lots (mateix ordre
+#: que la taula de predicats).
+_POL_ARCHETYPE_BY_CODE = tuple(a for _, a in _POL_ARCHETYPES)
+
+#: Nombre de sufixos per arquetip, per a tirades d'índex en bloc.
+_POL_SUFFIX_COUNTS = np.array([len(a["suffixes"])
+                               for a in _POL_ARCHETYPE_BY_CODE])
+
+
+if HAS_NUMBA:
+    @numba.njit(parallel=True, cache=True)
+    def _classify_pol(traits, out):
+        """Classifica cada fila de trets en un codi d'arquetip.
+
+        Columnes segons _TRAIT_COLUMNS; files independents.
+        """
+        for i in numba.prange(traits.shape[0]):
+            if traits[i, 0] > 70:
+                out[i] = 0
+            elif traits[i, 1] > 70:
+                out[i] = 1
+            elif traits[i, 2] > 70:
+                out[i] = 2
+            elif traits[i, 3] > 70:
+                out[i] = 3
+            elif traits[i, 4] > 70:
+                out[i] = 4
+            else:
+                out[i] = 5
+else:
+    def _classify_pol(traits, out):
+        """Variant numpy del classificador."""
+        conditions = [traits[:, k] > 70 for k in range(5)]
+        out[:] = np.select(conditions, (0, 1, 2, 3, 4), default=5)
+
+
+@dataclass(slots=True)
+class PoliticalSystem:
+    """Sistema polític d'una civilització.
+
+    Amb slots: sense __dict__ per instància, menys memòria i accés
+    d'atribut més ràpid quan es construeixen sistemes en bloc.
+    """
+    name: str
+    system_type: str
+    description: str
+    leader_title: str
+    succession_method: str
+    centralization: int
+    personal_freedom: int
+    legitimacy_source: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "system_type": self.system_type,
+            "description": self.description,
+            "leader_title": self.leader_title,
+            "succession_method": self.succession_method,
+            "centralization": self.centralization,
+            "personal_freedom": self.personal_freedom,
+            "legitimacy_source": self.legitimacy_source,
+        }
+
+
+class PoliticalSystemGenerator:
+    """Genera sistemes polítics amb Ollama o procedimentalment."""
+
+    def __init__(self):
+        self.ollama = get_ollama_client()
+        self._nprng = np.random.default_rng()
+        # Caché adreçada per contingut dels prompts, com al generador
+        # econòmic: contextos idèntics no repeteixen la crida al model.
+        self._cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # Caché de prompts
+
+    @staticmethod
+    def _prompt_key(prompt: str) -> bytes:
+        return hashlib.blake2b(prompt.encode(),
+                               digest_size=16).digest()
+
+    def _cache_get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+        return result
+
+    def _cache_put(self, key: bytes, result: Dict[str, Any]) -> None:
+        self._cache[key] = result
+        if len(self._cache) > _CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Generació
+
+    def generate_system(self, civilization_name: str,
+                        culture_traits: Dict[str, float],
+                        population: int,
+                        recent_history: Optional[List[str]] = None
+                        ) -> PoliticalSystem:
+        """Genera el sistema polític d'una civilització."""
+        if self.ollama.is_available():
+            try:
+                return self._generate_with_ai(civilization_name,
+                                              culture_traits, population,
+                                              recent_history)
+            except Exception as exc:
+                logger.warning(
+                    "Generació política amb IA fallida per a %s: %s",
+                    civilization_name, exc)
+        return self._generate_procedural(civilization_name,
+                                         culture_traits)
+
+    def generate_systems_batch(self, contexts: List[Dict[str, Any]]
+                               ) -> List[PoliticalSystem]:
+        """Genera els sistemes de diverses civilitzacions alhora.
+
+        Cada context porta els mateixos arguments que generate_system;
+        les respostes fallides cauen al camí procedural.
+        """
+        if not contexts:
+            return []
+        if not self.ollama.is_available():
+            return [self._generate_procedural(ctx["civilization_name"],
+                                              ctx["culture_traits"])
+                    for ctx in contexts]
+        prompts = [self._build_prompt(**ctx) for ctx in contexts]
+        keys = [self._prompt_key(prompt) for prompt in prompts]
+        misses: "OrderedDict[bytes, str]" = OrderedDict()
+        for key, prompt in zip(keys, prompts):
+            if key not in self._cache and key not in misses:
+                misses[key] = prompt
+        fetched: Dict[bytes, Any] = {}
+        if misses:
+            results = asyncio.run(
+                self._generate_many_async(list(misses.values())))
+            fetched = dict(zip(misses.keys(), results))
+        systems: List[PoliticalSystem] = []
+        for ctx, key in zip(contexts, keys):
+            cached = self._cache_get(key)
+            result = cached if cached is not None else fetched.get(key)
+            if result is None or isinstance(result, Exception):
+                logger.warning(
+                    "Generació política fallida per a %s: %s",
+                    ctx["civilization_name"], result)
+                systems.append(self._generate_procedural(
+                    ctx["civilization_name"], ctx["culture_traits"]))
+                continue
+            # Una resposta pot ser JSON vàlid però mal formada (camps
+            # amb el tipus equivocat): cau al camí procedural sense
+            # perdre la resta del lot, i no es cacheja mai.
+            try:
+                system = self._from_json(ctx["civilization_name"],
+                                         result)
+            except Exception as exc:
+                logger.warning(
+                    "Resposta política mal formada per a %s: %s",
+                    ctx["civilization_name"], exc)
+                systems.append(self._generate_procedural(
+                    ctx["civilization_name"], ctx["culture_traits"]))
+                continue
+            if cached is None:
+                self._cache_put(key, result)
+            systems.append(system)
+        return systems
+
+    async def _generate_many_async(self, prompts: List[str]) -> List[Any]:
+        """Despatxa tots els prompts alhora sobre el pool del client."""
+        return await self.ollama.generate_json_many(prompts, 0.9)
+
+    # ------------------------------------------------------------------
+    # Camí amb IA
+
+    def _build_prompt(self, civilization_name: str,
+                      culture_traits: Dict[str, float],
+                      population: int,
+                      recent_history: Optional[List[str]] = None) -> str:
+        """Construeix el prompt (pur: no envia res al model)."""
+        ctx = {
+            "civilization_name": civilization_name,
+            "population_fmt": f"{population:,}",
+            "traits_str": "\n".join(
+                f"- {name}: {value}"
+                for name, value in culture_traits.items()),
+            "history_str": "\n".join(f"- {fact}"
+                                     for fact in recent_history)
+            if recent_history else "- Sense esdeveniments registrats",
+        }
+        return _POL_PROMPT_TEMPLATE.format_map(ctx)
+
+    def _generate_with_ai(self, civilization_name: str,
+                          culture_traits: Dict[str, float],
+                          population: int,
+                          recent_history: Optional[List[str]] = None
+                          ) -> PoliticalSystem:
+        prompt = self._build_prompt(civilization_name, culture_traits,
+                                    population, recent_history)
+        key = self._prompt_key(prompt)
+        cached = self._cache_get(key)
+        result = cached if cached is not None \
+            else self.ollama.generate_json(prompt, temperature=0.9)
+        # Com al camí per lots: només es cacheja una resposta que s'ha
+        # materialitzat bé; si _from_json rebenta, l'excepció puja i
+        # generate_system cau al camí procedural sense pinçar-la al LRU.
+        system = self._from_json(civilization_name, result)
+        if cached is None:
+            self._cache_put(key, result)
+        return system
+
+    def _from_json(self, civilization_name: str,
+                   result: Dict[str, Any]) -> PoliticalSystem:
+        return PoliticalSystem(
+            name=result.get("name", f"Govern de {civilization_name}"),
+            system_type=result.get("system_type", "cabdillatge"),
+            description=result.get("description", ""),
+            leader_title=result.get("leader_title", "cap"),
+            succession_method=result.get("succession_method",
+                                         "herència"),
+            centralization=int(result.get("centralization", 50)),
+            personal_freedom=int(result.get("personal_freedom", 50)),
+            legitimacy_source=result.get("legitimacy_source",
+                                         "tradició"),
+        )
+
+    # ------------------------------------------------------------------
+    # Camí procedural
+
+    def generate_procedural_batch(self, civilization_names: List[str],
+                                  traits: "np.ndarray"
+                                  ) -> List[PoliticalSystem]:
+        """Classifica i construeix N sistemes procedurals de cop.
+
+        traits és una matriu (N, 5) float32 amb columnes _TRAIT_COLUMNS;
+        el llindarat corre compilat (o amb np.select sense numba) i
+        Python només materialitza els dataclasses dels codis.
+        """
+        n = len(civilization_names)
+        codes = np.empty(n, np.uint8)
+        _classify_pol(traits, codes)
+        # Tots els índexs de sufix del lot en una sola tirada.
+        suffix_idx = self._nprng.integers(0, _POL_SUFFIX_COUNTS[codes])
+        return [self._from_archetype(civilization_names[i],
+                                     _POL_ARCHETYPE_BY_CODE[codes[i]],
+                                     int(suffix_idx[i]))
+                for i in range(n)]
+
+    def _generate_procedural(self, civilization_name: str,
+                             culture_traits: Dict[str, float]
+                             ) -> PoliticalSystem:
+        """Deriva un sistema polític dels trets culturals."""
+        for predicate, archetype in _POL_ARCHETYPES:
+            if predicate(culture_traits):
+                break
+        return self._from_archetype(civilization_name, archetype)
+
+    def _from_archetype(self, civilization_name: str,
+                        archetype: Dict[str, Any],
+                        suffix_idx: Optional[int] = None
+                        ) -> PoliticalSystem:
+        suffixes = archetype["suffixes"]
+        if suffix_idx is None:
+            suffix_idx = random.randrange(len(suffixes))
+        suffix = suffixes[suffix_idx]
+        return PoliticalSystem(
+            name=f"{archetype['name_prefix']}{suffix} de "
+                 f"{civilization_name}",
+            system_type=archetype["system_type"],
+            description=archetype["description"],
+            leader_title=archetype["leader_title"],
+            succession_method=archetype["succession_method"],
+            centralization=archetype["centralization"],
+            personal_freedom=archetype["personal_freedom"],
+            legitimacy_source=archetype["legitimacy_source"])